@@ -1,6 +1,4 @@
 from fastapi import APIRouter, Header, HTTPException, Depends
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from sqlalchemy.orm import Session
 
 from back.database.db import get_db
@@ -22,6 +20,11 @@ def google_login(
 
     token = authorization.replace("Bearer ", "")
 
+    # google-auth is only needed here; importing it lazily keeps it out of
+    # API startup
+    from google.oauth2 import id_token
+    from google.auth.transport import requests
+
     try:
         idinfo = id_token.verify_oauth2_token(
             token,
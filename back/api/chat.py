@@ -1,33 +1,32 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from back.database.db import get_db
 from back.database.models import Chat, Message, User
 from back.core.auth import get_current_user
+from back.core.pagination import DEFAULT_LIMIT, MAX_LIMIT, encode_cursor, decode_cursor, keyset_page
 import uuid
-from rq import Queue
-from redis import Redis
-from back.workers.analyze_message import analyze_message
 
-redis = Redis(host="localhost", port=6379, db=0)
-queue = Queue("mecab_analyzer", connection=redis)
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 @router.get("")
 def list_chats(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    chats = (
-        db.query(Chat)
-        .filter(Chat.user_id == current_user.id)
-        .order_by(Chat.created_at.desc())
-        .all()
-    )
-    return [
-        {"id": str(c.id), "created_at": c.created_at}
-        for c in chats
-    ]
+    query = db.query(Chat.id, Chat.created_at).filter(Chat.user_id == current_user.id)
+    after = decode_cursor(cursor, 2) if cursor else None
+    chats, last_key = keyset_page(query, Chat.created_at, Chat.id, limit, after)
+    return {
+        "items": [
+            {"id": str(c.id), "created_at": c.created_at}
+            for c in chats
+        ],
+        "next_cursor": encode_cursor(*last_key) if last_key else None,
+    }
     
 @router.post("/create")
 def create_chat(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -60,12 +59,16 @@ def add_message(
     db.add(msg)
     db.commit()
     db.refresh(msg)
-    queue.enqueue(analyze_message, msg.id)
+    # rq/redis load on the first message rather than at API startup
+    from back.workers.queues import enqueue_analysis
+    enqueue_analysis(msg)
     return {"status": "ok", "message_id": msg.id}
 
 @router.get("/{chat_id}")
 def get_chat(
     chat_id: uuid.UUID,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    before: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -73,19 +76,21 @@ def get_chat(
     if not chat or chat.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    messages = (
-        db.query(Message)
-        .filter(Message.chat_id == chat_id)
-        .order_by(Message.created_at)
-        .all()
-    )
+    # newest page first; "before" walks back through older messages and
+    # each page is returned in chronological order
+    query = db.query(Message.id, Message.role, Message.text, Message.created_at).filter(Message.chat_id == chat_id)
+    after = decode_cursor(before, 2) if before else None
+    messages, last_key = keyset_page(query, Message.created_at, Message.id, limit, after)
 
-    return [
-        {
-            "id": m.id,
-            "role": m.role,
-            "text": m.text,
-            "created_at": m.created_at
-        }
-        for m in messages
-    ]
\ No newline at end of file
+    return {
+        "items": [
+            {
+                "id": m.id,
+                "role": m.role,
+                "text": m.text,
+                "created_at": m.created_at
+            }
+            for m in reversed(messages)
+        ],
+        "next_cursor": encode_cursor(*last_key) if last_key else None,
+    }
@@ -1,7 +1,19 @@
-from fastapi import APIRouter
+import json
+import time
+import traceback
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from back.logic.llm import translate, lesson
-from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from back.core.auth import get_current_user
+from back.database.db import get_db
+from back.database.models import Chat, Message, User
+from back.logic.grammar import persist_grammar_batch
+from back.logic.llm import translate_request, lesson_request, lesson_fields, lesson_prefix, format_lesson, complete, stream
+from back.logic.llm_cache import response_cache
 
 router = APIRouter(prefix="/llm", tags=["llm"])
 
@@ -12,11 +24,119 @@ class LessonInput(BaseModel):
     grammar_vocab: str
     sentence: str
 
+class LessonSave(LessonInput):
+    chat_id: uuid.UUID
+
+async def cached_completion(request: dict, kind: str) -> str:
+    return await response_cache.get_or_compute(request, lambda: complete(request, kind))
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_completion(request: dict, kind: str, render=None, finish=None):
+    # "delta" events carry text as it arrives, the final "done" event the
+    # full text so the client can persist it without re-assembling. render
+    # maps the output received so far to the text shown, finish maps the
+    # whole output to the payload of the done event.
+    text = await response_cache.get(request)
+    if text is not None:
+        yield sse("delta", {"delta": render(text) if render else text})
+    else:
+        parts = []
+        shown = ""
+        start = time.perf_counter()
+        try:
+            async for delta in stream(request, kind):
+                parts.append(delta)
+                if render:
+                    view = render("".join(parts))
+                    delta = view[len(shown):] if view.startswith(shown) else ""
+                    shown = view if delta else shown
+                if delta:
+                    yield sse("delta", {"delta": delta})
+        except Exception:
+            # upstream errors can carry request details; the client only learns
+            # that the completion failed
+            traceback.print_exc()
+            yield sse("error", {"detail": "The model request failed"})
+            return
+        text = "".join(parts)
+        await response_cache.put(request, text, time.perf_counter() - start)
+    try:
+        done = await finish(text) if finish else {"text": text}
+    except Exception:
+        traceback.print_exc()
+        yield sse("error", {"detail": "The model request failed"})
+        return
+    yield sse("done", done)
+
+def event_stream(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/translate")
 async def translate_endpoint(payload: TranslateInput):
-    return await run_in_threadpool(translate, payload.text)
+    return {"translation": await cached_completion(translate_request(payload.text), "translate")}
+
+@router.post("/translate/stream")
+async def translate_stream_endpoint(payload: TranslateInput):
+    return event_stream(stream_completion(translate_request(payload.text), "translate"))
+
+async def structured_lesson(payload: LessonInput) -> dict:
+    request = lesson_request(payload.grammar_vocab, payload.sentence, structured=True)
+    try:
+        return lesson_fields(await cached_completion(request, "lesson"))
+    except ValueError:
+        raise HTTPException(status_code=502, detail="Malformed lesson from the model")
 
 @router.post("/lesson")
 async def lesson_endpoint(payload: LessonInput):
-    return await run_in_threadpool(lesson, payload.grammar_vocab, payload.sentence)
+    fields = await structured_lesson(payload)
+    return {"lesson": format_lesson(fields), "fields": fields}
+
+def save_lesson(db: Session, user_id, chat_id, fields: dict) -> uuid.UUID:
+    # The lesson is stored as an assistant message that is already
+    # analyzed: its grammar is written in the same transaction, so no
+    # analyzer job is queued and nothing re-parses the text.
+    msg = Message(chat_id=chat_id, role="assistant", text=format_lesson(fields), analyzed_at=datetime.utcnow())
+    db.add(msg)
+    db.flush()
+    if fields["pattern"]:
+        persist_grammar_batch(db, [(user_id, msg.id, fields)])
+    db.commit()
+    return msg.id
+
+def owns_chat(db: Session, user_id, chat_id) -> bool:
+    try:
+        return db.query(Chat.id).filter(Chat.id == chat_id, Chat.user_id == user_id).first() is not None
+    finally:
+        # ends the transaction, so the connection goes back to the pool
+        # rather than sitting idle in transaction through the LLM call
+        db.rollback()
+
+@router.post("/lesson/stream")
+async def lesson_stream_endpoint(
+    payload: LessonSave,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # Streams the structured lesson as chat text and stores it with its
+    # grammar once complete; the done event carries the saved message id.
+    user_id = current_user.id
+    if not await run_in_threadpool(owns_chat, db, user_id, payload.chat_id):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    async def finish(text: str) -> dict:
+        fields = lesson_fields(text)
+        message_id = await run_in_threadpool(save_lesson, db, user_id, payload.chat_id, fields)
+        return {"text": format_lesson(fields), "fields": fields, "message_id": str(message_id)}
+
+    request = lesson_request(payload.grammar_vocab, payload.sentence, structured=True)
+    return event_stream(stream_completion(request, "lesson", render=lesson_prefix, finish=finish))
 
+@router.get("/cache-stats")
+def cache_stats():
+    return response_cache.stats()
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from typing import Union
 from fastapi import FastAPI
 from back.api.llm import router as llm_router
@@ -6,8 +7,19 @@ from back.api.chat import router as chat_router
 from back.api.auth import router as auth_router
 from back.api.mypage import router as mypage_router
 from back.api.memorize import router as memorize_router
-from back.api.realtime import router as realtime_router
-app = FastAPI()
+from back.api.realtime import router as realtime_router, token_pool
+from back.api.metrics import router as metrics_router
+from back.core.metrics import TimingMiddleware
+from back.logic.llm import close_client as close_llm_client
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await token_pool.start()
+    yield
+    await token_pool.stop()
+    await close_llm_client()
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(chat_router)
 app.add_middleware(
     CORSMiddleware,
@@ -21,9 +33,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TimingMiddleware)
 
 app.include_router(llm_router)
 app.include_router(auth_router)
 app.include_router(mypage_router)
 app.include_router(memorize_router)
-app.include_router(realtime_router)
\ No newline at end of file
+app.include_router(realtime_router)
+app.include_router(metrics_router)
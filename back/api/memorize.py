@@ -1,12 +1,14 @@
+from datetime import datetime
+from typing import List
 from fastapi import APIRouter, Depends
 from back.database.models import User, User_Vocab, User_Grammar, Vocab, Grammar
 from back.database.db import get_db
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import DateTime, Float, column, update, values
 from back.core.auth import get_current_user
-from back.logic.retention import update_recall
+from back.logic.retention import review_priority, update_recall, update_recall_many
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/memorize", tags=["memorize"])
 
@@ -15,25 +17,15 @@ def get_cards(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    N = user.daily_limit
-
-    total_count = (
-        db.query(func.sum(User_Vocab.count))
-        .filter(User_Vocab.user_id == current_user.id)
-        .scalar()
-    ) or 0
-
-    if total_count == 0:
-        return []
-
-    score = (User_Vocab.count / total_count) * func.coalesce(1-User_Vocab.recall, 0.8)
+    N = current_user.daily_limit
 
+    # only columns of ix_user_vocabs_user_priority from user_vocabs, so the
+    # top rows come from an index-only scan
     rows = (
-        db.query(User_Vocab, Vocab)
+        db.query(User_Vocab.vocab_id, User_Vocab.count, User_Vocab.recall, Vocab.base, Vocab.translation)
         .join(Vocab, User_Vocab.vocab_id == Vocab.id)
         .filter(User_Vocab.user_id == current_user.id)
-        .order_by(score.desc())
+        .order_by(User_Vocab.priority.desc().nullslast())
         .limit(N)
         .all()
     )
@@ -41,19 +33,19 @@ def get_cards(
     # Return JSON the frontend can render
     return [
         {
-            "vocab_id": uv.vocab_id,
-            "base": v.base,
-            "translation": v.translation,
-            "recall": uv.recall,
-            "count": uv.count,
+            "vocab_id": row.vocab_id,
+            "base": row.base,
+            "translation": row.translation,
+            "recall": row.recall,
+            "count": row.count,
         }
-        for uv, v in rows
+        for row in rows
     ]
 
 class ReviewRequest(BaseModel):
     vocab_id: UUID
     success: bool
-    failures: int
+    failures: int = Field(ge=0)
 
 @router.post("/review")
 def review(
@@ -75,3 +67,67 @@ def review(
 
     db.commit()
     return {"status": "ok"}
+
+class ReviewBatchRequest(BaseModel):
+    reviews: List[ReviewRequest]
+
+@router.post("/review-batch")
+def review_batch(
+    payload: ReviewBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # a whole flashcard session in one round trip: one SELECT, one
+    # vectorized update_recall, one UPDATE ... FROM (VALUES ...). The SELECT
+    # locks the rows in vocab_id order, the order the analyzer's upsert
+    # locks them in, so the two cannot deadlock and recall is computed from
+    # values nobody changes before the UPDATE.
+    failures = {}
+    for r in payload.reviews:
+        if r.success:
+            failures.setdefault(r.vocab_id, r.failures)
+    if not failures:
+        return {"status": "ok", "updated": 0}
+
+    rows = (
+        db.query(User_Vocab.id, User_Vocab.vocab_id, User_Vocab.last_viewed, User_Vocab.learning_inertia, User_Vocab.count)
+        .filter(User_Vocab.user_id == current_user.id, User_Vocab.vocab_id.in_(failures))
+        .order_by(User_Vocab.vocab_id)
+        .with_for_update()
+        .all()
+    )
+    if not rows:
+        return {"status": "ok", "updated": 0}
+
+    now = datetime.utcnow()
+    recall, inertia = update_recall_many(
+        [r.last_viewed for r in rows],
+        [r.learning_inertia if r.learning_inertia is not None else float("nan") for r in rows],
+        [failures[r.vocab_id] for r in rows],
+        now,
+    )
+    priority = [review_priority(r.count, p) for r, p in zip(rows, recall.tolist())]
+    reviewed = values(
+        column("id", User_Vocab.id.type),
+        column("recall", Float),
+        column("learning_inertia", Float),
+        column("priority", Float),
+        column("last_viewed", DateTime),
+        name="reviewed",
+    ).data([
+        (r.id, p, a, q, now)
+        for r, p, a, q in zip(rows, recall.tolist(), inertia.tolist(), priority)
+    ])
+    db.execute(
+        update(User_Vocab)
+        .where(User_Vocab.id == reviewed.c.id)
+        .values(
+            recall=reviewed.c.recall,
+            learning_inertia=reviewed.c.learning_inertia,
+            priority=reviewed.c.priority,
+            last_viewed=reviewed.c.last_viewed,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return {"status": "ok", "updated": len(rows)}
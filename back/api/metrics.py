@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Response
+from back.api.realtime import token_pool
+from back.core import metrics
+from back.core.auth import user_cache_size
+from back.database.db import pool_metrics
+from back.logic.llm_cache import response_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+@metrics.register_collector
+def _db_pool():
+    for key, value in pool_metrics().items():
+        yield f"db_pool_{key}", "SQLAlchemy connection pool state", {}, value
+
+
+@metrics.register_collector
+def _caches():
+    for key, value in response_cache.stats().items():
+        yield f"llm_cache_{key}", "LLM response cache", {}, value
+    yield "auth_user_cache_size", "Cached authenticated users", {}, user_cache_size()
+    yield "realtime_token_pool_hits", "Realtime tokens served from the pool", {}, token_pool.hits
+    yield "realtime_token_pool_misses", "Realtime tokens minted on demand", {}, token_pool.misses
+
+
+@metrics.register_collector
+def _queues():
+    # imported at scrape time so rq/redis stay out of API startup
+    from back.workers.queues import analyzer_queue
+    labels = {"queue": analyzer_queue.name}
+    yield "rq_queue_depth", "Jobs waiting in the queue", labels, analyzer_queue.count
+    yield "rq_failed_jobs", "Jobs in the failed job registry", labels, analyzer_queue.failed_job_registry.count
+
+
+@router.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,53 +1,90 @@
-from fastapi import APIRouter, Depends
-from back.database.models import User, User_Vocab, User_Grammar, Vocab, Grammar
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from back.database.models import User, User_Vocab, User_Grammar, Vocab, Grammar, last_viewed_key
 from back.database.db import get_db
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from back.core.auth import get_current_user
-from back.logic.retention import recompute_recall
+from back.core.pagination import DEFAULT_LIMIT, MAX_LIMIT, encode_cursor, decode_cursor, keyset_page
+from back.logic.retention import recompute_recall_many, recall_sql
+from back.workers.vocab_export import MEDIA_TYPES, export_vocab
+import math
 
 router = APIRouter(prefix="/mypage", tags=["mypage"])
 
 @router.get("/vocab-table")
 def get_vocab_table(
+    sort: Literal["count", "recall", "last_viewed"] = "count",
+    order: Literal["desc", "asc"] = "desc",
+    q: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    user_vocabs = (
-        db.query(User_Vocab)
-        .filter(User_Vocab.user_id == current_user.id)
-        .all()
-    )
-    for user_vocab in user_vocabs:
-        recompute_recall(user_vocab)
-    db.commit()
-    rows = (
+    # the cursor pins "now" so recall-sorted pages stay consistent
+    after, now = None, datetime.utcnow()
+    if cursor:
+        *after, now = decode_cursor(cursor, 3)
+
+    if sort == "count":
+        sort_key = User_Vocab.count
+    elif sort == "last_viewed":
+        sort_key = last_viewed_key
+    else:
+        recall = recall_sql(User_Vocab.last_viewed, User_Vocab.learning_inertia, now)
+        sort_key = func.coalesce(recall, User_Vocab.recall, -1.0)
+
+    query = (
         db.query(
             Vocab.base.label("word"),
             Vocab.translation.label("translation"),
             User_Vocab.count.label("count"),
             User_Vocab.recall.label("recall"),
             User_Vocab.last_viewed.label("last_viewed"),
+            User_Vocab.learning_inertia.label("learning_inertia"),
         )
         .join(User_Vocab, User_Vocab.vocab_id == Vocab.id)
         .filter(User_Vocab.user_id == current_user.id)
-        .order_by(User_Vocab.count.desc(), User_Vocab.last_viewed.desc().nullslast())
-        .all()
     )
+    if q:
+        query = query.filter(Vocab.base.startswith(q, autoescape=True))
+    rows, last_key = keyset_page(query, sort_key, User_Vocab.id, limit, after, order == "desc")
+
+    # recall decays with time; compute it for the response instead of
+    # writing every row back on a page view
+    recalls = recompute_recall_many(
+        [r.last_viewed for r in rows],
+        [r.learning_inertia for r in rows],
+        [r.recall for r in rows],
+        now=now,
+    ).tolist()
 
-    return [
-        {
-            "Word": r.word,
-            "Translation": r.translation,
-            "Count": r.count,
-            "Recall": r.recall,
-            "LastViewed": r.last_viewed,
-        }
-        for r in rows
-    ]
+    return {
+        "items": [
+            {
+                "Word": r.word,
+                "Translation": r.translation,
+                "Count": r.count,
+                "Recall": None if math.isnan(recall) else recall,
+                "LastViewed": r.last_viewed,
+            }
+            for r, recall in zip(rows, recalls)
+        ],
+        "next_cursor": encode_cursor(*last_key, now) if last_key else None,
+    }
 
 @router.get("/grammar-table")
-def get_grammar_table(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = (
+def get_grammar_table(
+    q: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    query = (
         db.query(
             Grammar.title,
             Grammar.function,
@@ -58,22 +95,40 @@ def get_grammar_table(current_user: User = Depends(get_current_user), db: Sessio
         )
         .join(User_Grammar, User_Grammar.grammar_id == Grammar.id)
         .filter(User_Grammar.user_id == current_user.id)
-        .order_by(User_Grammar.count.desc())
-        .all()
     )
+    if q:
+        query = query.filter(Grammar.title.startswith(q, autoescape=True))
+    after = decode_cursor(cursor, 2) if cursor else None
+    rows, last_key = keyset_page(query, User_Grammar.count, User_Grammar.id, limit, after)
+
+    return {
+        "items": [
+            {
+                "Grammar": row.title,
+                "Function": row.function,
+                "Meaning": row.meaning,
+                "Boundary": row.boundary,
+                "Count": row.count,
+                "Recall": row.recall
+            }
+            for row in rows
+        ],
+        "next_cursor": encode_cursor(*last_key) if last_key else None,
+    }
 
-    return [
-        {
-            "Grammar": row.title,
-            "Function": row.function,
-            "Meaning": row.meaning,
-            "Boundary": row.boundary,
-            "Count": row.count,
-            "Recall": row.recall
-        }
-        for row in rows
-    ]
+@router.get("/vocab-export")
+def get_vocab_export(
+    format: Literal["arrow", "parquet"] = "arrow",
+    current_user: User = Depends(get_current_user),
+):
+    # the whole vocab of the user in one columnar download; streamed batch
+    # by batch from its own session, which lives as long as the response
+    return StreamingResponse(
+        export_vocab(format, current_user.id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="vocab.{format}"'},
+    )
 
 @router.get("/vocab-chart")
 def get_vocab_chart(current_user: User = Depends(get_current_user)):
-    return {"message": "Hello, World!"}
\ No newline at end of file
+    return {"message": "Hello, World!"}
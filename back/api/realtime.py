@@ -1,33 +1,126 @@
+import asyncio
 import os
+import time
+import traceback
+from collections import deque
 import httpx
 from fastapi import APIRouter, HTTPException, Response
 
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+REALTIME_MODEL = "gpt-4o-realtime-preview-latest"
+REALTIME_TOKEN_POOL_SIZE = int(os.environ.get("REALTIME_TOKEN_POOL_SIZE", 2))
+# a pooled token is only handed out if it stays valid at least this long
+REALTIME_TOKEN_MIN_TTL = float(os.environ.get("REALTIME_TOKEN_MIN_TTL", 20))
+# stop re-minting expired tokens after this long without a request
+REALTIME_TOKEN_IDLE = float(os.environ.get("REALTIME_TOKEN_IDLE", 600))
+
 router = APIRouter(tags=["realtime"])
 
-@router.get("/realtime-token")
-async def realtime_token():
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OPENAI_API_KEY not set")
 
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.post(
-            "https://api.openai.com/v1/realtime/sessions",
+class TokenPool:
+    # Keeps a few unexpired ephemeral realtime sessions minted ahead of time
+    # so /realtime-token answers without waiting on OpenAI. Ephemeral
+    # tokens only live for about a minute, so the pool is kept warm only
+    # while the endpoint is in use.
+    def __init__(self, size=REALTIME_TOKEN_POOL_SIZE, min_ttl=REALTIME_TOKEN_MIN_TTL, idle=REALTIME_TOKEN_IDLE):
+        self.size = size
+        self.min_ttl = min_ttl
+        self.idle = idle
+        self.client = None
+        self._tokens = deque()
+        self._wanted = asyncio.Event()
+        self._task = None
+        self._last_used = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _client(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(base_url=OPENAI_BASE_URL, timeout=15)
+        return self.client
+
+    async def start(self):
+        self._client()
+        if self.size > 0 and os.environ.get("OPENAI_API_KEY"):
+            self._last_used = time.time()
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.client:
+            await self.client.aclose()
+
+    async def mint(self):
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise HTTPException(status_code=500, detail="OPENAI_API_KEY not set")
+
+        r = await self._client().post(
+            "/realtime/sessions",
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
             },
             json={
-                "model": "gpt-4o-realtime-preview-latest",
+                "model": REALTIME_MODEL,
             },
         )
 
-    if r.status_code >= 400:
-        raise HTTPException(status_code=r.status_code, detail=r.text)
+        if r.status_code >= 400:
+            raise HTTPException(status_code=r.status_code, detail=r.text)
 
-    data = r.json()
-    token = (data.get("client_secret") or {}).get("value")
-    if not token:
-        raise HTTPException(status_code=500, detail=f"Missing client_secret.value: {data}")
+        data = r.json()
+        secret = data.get("client_secret") or {}
+        token = secret.get("value")
+        if not token:
+            raise HTTPException(status_code=500, detail=f"Missing client_secret.value: {data}")
+        return token, secret.get("expires_at") or time.time() + 60
 
+    async def get(self):
+        self._last_used = time.time()
+        self._wanted.set()
+        while self._tokens:
+            token, expires_at = self._tokens.popleft()
+            if expires_at - time.time() > self.min_ttl:
+                self.hits += 1
+                return token
+        self.misses += 1
+        token, _ = await self.mint()
+        return token
+
+    async def _maintain(self):
+        while True:
+            self._wanted.clear()
+            now = time.time()
+            self._tokens = deque(t for t in self._tokens if t[1] - now > self.min_ttl)
+            if now - self._last_used < self.idle:
+                try:
+                    while len(self._tokens) < self.size:
+                        self._tokens.append(await self.mint())
+                except Exception:
+                    # whatever minting hit (an HTTP error, a malformed
+                    # response), the refill task must outlive it
+                    traceback.print_exc()
+                    await asyncio.sleep(5)
+                    continue
+
+            now = time.time()
+            wake = min((t[1] - self.min_ttl for t in self._tokens), default=now + self.idle)
+            try:
+                await asyncio.wait_for(self._wanted.wait(), timeout=max(wake - now, 1))
+            except asyncio.TimeoutError:
+                pass
+
+
+token_pool = TokenPool()
+
+
+@router.get("/realtime-token")
+async def realtime_token():
+    token = await token_pool.get()
     return Response(content=token, media_type="text/plain")
@@ -1,6 +1,11 @@
+import os
+import threading
+import time
+from collections import OrderedDict
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from uuid import UUID
 
@@ -8,8 +13,52 @@ from back.database.db import get_db
 from back.database.models import User
 from back.core.security import SECRET_KEY, ALGORITHM
 
+AUTH_USER_CACHE_TTL = float(os.environ.get("AUTH_USER_CACHE_TTL", 30))
+AUTH_USER_CACHE_SIZE = int(os.environ.get("AUTH_USER_CACHE_SIZE", 10000))
+
 security = HTTPBearer()
 
+# sub -> (detached User, expires_at). Per process; other processes see a
+# changed user row after at most AUTH_USER_CACHE_TTL seconds. Sync
+# dependencies run in the threadpool, hence the lock.
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def invalidate_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop(str(user_id), None)
+
+
+def user_cache_size() -> int:
+    return len(_user_cache)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def _cached_user(user_id: str):
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at < time.monotonic():
+            del _user_cache[user_id]
+            return None
+        return user
+
+
+def _remember_user(user_id: str, user: User):
+    with _user_cache_lock:
+        _user_cache[user_id] = (user, time.monotonic() + AUTH_USER_CACHE_TTL)
+        _user_cache.move_to_end(user_id)
+        while len(_user_cache) > AUTH_USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -32,6 +81,10 @@ def get_current_user(
             detail="Invalid token payload",
         )
 
+    user = _cached_user(user_id)
+    if user is not None:
+        return user
+
     user = db.query(User).filter(User.id == UUID(user_id)).first()
     if not user:
         raise HTTPException(
@@ -39,4 +92,8 @@ def get_current_user(
             detail="User not found",
         )
 
+    # detached so a commit in this or a later request cannot expire the
+    # attributes of the shared instance
+    db.expunge(user)
+    _remember_user(user_id, user)
     return user
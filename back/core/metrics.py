@@ -0,0 +1,173 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Minimal Prometheus text-format metrics, per process. An observation is a
+# bisect and a few additions under a lock, cheap enough for every request,
+# stage and query.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_histograms = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _histograms.append(self)
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(k, list(v[0]), v[1]) for k, v in self._series.items()]
+        for labelvalues, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {cumulative}")
+        return lines
+
+
+def register_collector(fn):
+    # fn() -> iterable of (name, documentation, {labels}, value), read at
+    # scrape time and rendered as gauges
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    lines = []
+    for histogram in _histograms:
+        lines += histogram.render()
+    seen = set()
+    for collector in _collectors:
+        try:
+            samples = list(collector())
+        except Exception:
+            continue
+        for name, documentation, labels, value in samples:
+            if value is None:
+                continue
+            if name not in seen:
+                seen.add(name)
+                lines += [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+            lines.append(f"{name}{_labels(labels.keys(), labels.values())} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "HTTP request latency until the response body is sent", ("method", "route", "status")
+)
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "Database statement execution time", ("operation",))
+ANALYZER_STAGE_SECONDS = Histogram("analyzer_stage_seconds", "Time per analyze_messages stage", ("stage",))
+LLM_REQUEST_SECONDS = Histogram("llm_request_seconds", "Upstream LLM call time", ("kind", "mode"))
+LLM_FIRST_TOKEN_SECONDS = Histogram("llm_first_token_seconds", "Time to the first streamed LLM delta", ("kind",))
+
+
+class TimingMiddleware:
+    # Pure ASGI so streamed responses are timed until their last chunk;
+    # labelled by route template, not path, to keep cardinality bounded.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status[0]),
+            )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_start(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_end(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "metrics_start", None)
+    if started is None:
+        return
+    words = statement.split(None, 1)
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started, words[0].upper() if words else "EMPTY")
+
+
+def start_metrics_server(port: int):
+    # Serves render() on its own thread, for processes without an HTTP app
+    # (the analyzer workers).
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,68 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import tuple_, literal
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"uuid": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "uuid" in value:
+            return uuid.UUID(value["uuid"])
+    return value
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_query(query, sort_key, tiebreak, limit, after=None, descending=True):
+    # the page query of keyset_page, one extra row to detect a next page
+    if after is not None:
+        bound = tuple_(literal(after[0], sort_key.type), literal(after[1], tiebreak.type))
+        key = tuple_(sort_key, tiebreak)
+        query = query.filter(key < bound if descending else key > bound)
+    order = (sort_key.desc(), tiebreak.desc()) if descending else (sort_key.asc(), tiebreak.asc())
+    return (
+        query.add_columns(sort_key.label("sort_key"), tiebreak.label("cursor_id"))
+        .order_by(*order)
+        .limit(limit + 1)
+    )
+
+
+def keyset_page(query, sort_key, tiebreak, limit, after=None, descending=True):
+    # Keyset pagination over (sort_key, tiebreak). sort_key must be non-null
+    # so the row comparison is total; after is the (sort value, id) pair of
+    # the last row of the previous page. Returns (rows, last_key); rows
+    # carry sort_key/cursor_id labels, last_key is None on the last page.
+    rows = keyset_query(query, sort_key, tiebreak, limit, after, descending).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1].sort_key, rows[-1].cursor_id)
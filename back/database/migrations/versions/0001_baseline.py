@@ -0,0 +1,101 @@
+"""Baseline schema: the tables as first created by Base.metadata.create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("email", sa.Text, unique=True),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("daily_limit", sa.Integer),
+    )
+    op.create_table(
+        "chats",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("user_id", UUID, sa.ForeignKey("users.id")),
+        sa.Column("created_at", sa.DateTime),
+    )
+    op.create_table(
+        "messages",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("chat_id", UUID, sa.ForeignKey("chats.id")),
+        sa.Column("role", sa.Text),
+        sa.Column("text", sa.Text),
+        sa.Column("created_at", sa.DateTime),
+    )
+    op.create_table(
+        "vocabs",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("base", sa.Text),
+        sa.Column("pos", sa.Text),
+        sa.Column("translation", sa.Text),
+        sa.Column("message_id", UUID, sa.ForeignKey("messages.id")),
+        sa.Column("count", sa.Integer),
+    )
+    op.create_table(
+        "user_vocabs",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("user_id", UUID, sa.ForeignKey("users.id")),
+        sa.Column("vocab_id", UUID, sa.ForeignKey("vocabs.id")),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("count", sa.Integer),
+        sa.Column("recall", sa.Float),
+        sa.Column("last_viewed", sa.DateTime),
+        sa.Column("learning_inertia", sa.Float),
+    )
+    op.create_table(
+        "grammars",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("title", sa.Text),
+        sa.Column("function", sa.Text),
+        sa.Column("form", sa.Text),
+        sa.Column("meaning", sa.Text),
+        sa.Column("example", sa.Text),
+        sa.Column("boundary", sa.Text),
+        sa.Column("mistakes", sa.Text),
+        sa.Column("count", sa.Integer),
+        sa.Column("message_id", UUID, sa.ForeignKey("messages.id")),
+    )
+    op.create_table(
+        "user_grammars",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("user_id", UUID, sa.ForeignKey("users.id")),
+        sa.Column("grammar_id", UUID, sa.ForeignKey("grammars.id")),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("count", sa.Integer),
+        sa.Column("recall", sa.Float),
+        sa.Column("last_viewed", sa.DateTime),
+    )
+    op.create_table(
+        "vocab_occurrences",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("vocab_id", UUID, sa.ForeignKey("vocabs.id")),
+        sa.Column("message_id", UUID, sa.ForeignKey("messages.id")),
+    )
+    op.create_table(
+        "grammar_occurrences",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("grammar_id", UUID, sa.ForeignKey("grammars.id")),
+        sa.Column("message_id", UUID, sa.ForeignKey("messages.id")),
+    )
+
+
+def downgrade():
+    for table in (
+        "grammar_occurrences", "vocab_occurrences", "user_grammars", "grammars",
+        "user_vocabs", "vocabs", "messages", "chats", "users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,163 @@
+"""Indexes, unique keys and the columns added since the baseline
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Adds messages.analyzed_at, user_vocabs.priority and grammars.title_key.
+It backfills title_key and merges the duplicate rows that the unique keys
+would reject, sets NULL grammar counts to 0, then backfills priority in
+batches. Finally it builds every index with CREATE INDEX CONCURRENTLY, so
+reads and writes keep going during the build. Stop the analyzer workers
+for the upgrade, since rows they insert between the merge and the index
+build can fail a unique build. A failed run can simply be re-run: invalid
+leftovers of an interrupted concurrent build are dropped and rebuilt.
+"""
+from alembic import op
+import sqlalchemy as sa
+from back.database.models import grammar_title_key
+from back.logic.retention import UNKNOWN_FORGETTING
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# unique indexes, each attached as the constraint of the same name
+UNIQUE_KEYS = [
+    ("uq_vocabs_base_pos", "vocabs", ["base", "pos"]),
+    ("uq_user_vocabs_user_vocab", "user_vocabs", ["user_id", "vocab_id"]),
+    ("uq_grammars_title_key", "grammars", ["title_key"]),
+    ("uq_user_grammars_user_grammar", "user_grammars", ["user_id", "grammar_id"]),
+]
+# (name, table, columns, create_index options)
+INDEXES = [
+    ("ix_chats_user_created", "chats", ["user_id", "created_at", "id"], {}),
+    ("ix_messages_chat_created", "messages", ["chat_id", "created_at", "id"], {}),
+    ("ix_vocabs_base_prefix", "vocabs", ["base"], {"postgresql_ops": {"base": "text_pattern_ops"}}),
+    ("ix_user_vocabs_user_count", "user_vocabs", ["user_id", "count", "id"], {}),
+    (
+        "ix_user_vocabs_user_last_viewed", "user_vocabs",
+        ["user_id", sa.text("coalesce(last_viewed, 'epoch'::timestamp)"), "id"], {},
+    ),
+    (
+        "ix_user_vocabs_user_priority", "user_vocabs",
+        ["user_id", sa.text("priority DESC NULLS LAST")],
+        {"postgresql_include": ["vocab_id", "count", "recall"]},
+    ),
+    ("ix_user_grammars_user_count", "user_grammars", ["user_id", "count", "id"], {}),
+    ("ix_vocab_occurrences_message", "vocab_occurrences", ["message_id"], {}),
+    ("ix_vocab_occurrences_vocab", "vocab_occurrences", ["vocab_id"], {}),
+    ("ix_grammar_occurrences_message", "grammar_occurrences", ["message_id"], {}),
+    ("ix_grammar_occurrences_grammar", "grammar_occurrences", ["grammar_id"], {}),
+]
+
+
+def merge_duplicates(table, keys, order="id", references=()):
+    # Keeps the first row of each key group in `order`, adds the other rows'
+    # counts to it, points references (table, column) at it and deletes
+    # the rest.
+    key_list = ", ".join(keys)
+    op.execute(f"""
+        CREATE TEMP TABLE dupes AS
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (PARTITION BY {key_list} ORDER BY {order}) AS keep_id
+            FROM {table}
+            WHERE {" AND ".join(f"{key} IS NOT NULL" for key in keys)}
+        ) ranked
+        WHERE id <> keep_id
+    """)
+    op.execute(f"""
+        UPDATE {table} SET count = coalesce({table}.count, 0) + merged.count
+        FROM (
+            SELECT dupes.keep_id, sum(coalesce(t.count, 0)) AS count
+            FROM dupes JOIN {table} t ON t.id = dupes.id
+            GROUP BY dupes.keep_id
+        ) merged
+        WHERE {table}.id = merged.keep_id
+    """)
+    for ref_table, column in references:
+        op.execute(f"UPDATE {ref_table} SET {column} = dupes.keep_id FROM dupes WHERE {ref_table}.{column} = dupes.id")
+    op.execute(f"DELETE FROM {table} USING dupes WHERE {table}.id = dupes.id")
+    op.execute("DROP TABLE dupes")
+
+
+def backfill_title_keys():
+    # in Python so existing keys match the ones the analyzer computes
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, title FROM grammars WHERE title_key IS NULL AND title IS NOT NULL")).all()
+    if rows:
+        connection.execute(
+            sa.text("UPDATE grammars SET title_key = :key WHERE id = :id"),
+            [{"id": grammar_id, "key": grammar_title_key(title)} for grammar_id, title in rows],
+        )
+
+
+def backfill_priority():
+    # one short transaction per batch (autocommit) so the table is never
+    # locked as a whole
+    connection = op.get_bind()
+    while connection.execute(sa.text(f"""
+        UPDATE user_vocabs SET priority = count * coalesce(1 - recall, {UNKNOWN_FORGETTING})
+        WHERE id IN (
+            SELECT id FROM user_vocabs WHERE priority IS NULL AND count IS NOT NULL LIMIT :n
+        )
+    """), {"n": BACKFILL_BATCH_SIZE}).rowcount:
+        pass
+
+
+def drop_if_invalid(name):
+    connection = op.get_bind()
+    invalid = connection.execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def create_index(name, table, columns, unique=False, **kwargs):
+    drop_if_invalid(name)
+    op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def upgrade():
+    op.add_column("messages", sa.Column("analyzed_at", sa.DateTime))
+    op.add_column("user_vocabs", sa.Column("priority", sa.Float))
+    op.add_column("grammars", sa.Column("title_key", sa.Text))
+
+    backfill_title_keys()
+    merge_duplicates("vocabs", ["base", "pos"], references=[("user_vocabs", "vocab_id"), ("vocab_occurrences", "vocab_id")])
+    merge_duplicates("user_vocabs", ["user_id", "vocab_id"], order="last_viewed DESC NULLS LAST, id")
+    merge_duplicates("grammars", ["title_key"], references=[("user_grammars", "grammar_id"), ("grammar_occurrences", "grammar_id")])
+    merge_duplicates("user_grammars", ["user_id", "grammar_id"], order="last_viewed DESC NULLS LAST, id")
+    # the analyzer's upserts add to count, which NULL would swallow
+    op.execute("UPDATE grammars SET count = 0 WHERE count IS NULL")
+    op.execute("UPDATE user_grammars SET count = 0 WHERE count IS NULL")
+
+    with op.get_context().autocommit_block():
+        backfill_priority()
+        for name, table, columns in UNIQUE_KEYS:
+            create_index(name, table, columns, unique=True)
+            op.execute(f"""
+                DO $$ BEGIN
+                    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{name}') THEN
+                        ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name};
+                    END IF;
+                END $$
+            """)
+        for name, table, columns, kwargs in INDEXES:
+            create_index(name, table, columns, **kwargs)
+        op.execute("ANALYZE")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    for name, table, _ in UNIQUE_KEYS:
+        op.drop_constraint(name, table, type_="unique")
+    op.drop_column("grammars", "title_key")
+    op.drop_column("user_vocabs", "priority")
+    op.drop_column("messages", "analyzed_at")
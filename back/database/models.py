@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Text, ForeignKey, DateTime, Integer, Float
+from sqlalchemy import Column, Text, ForeignKey, DateTime, Integer, Float, UniqueConstraint, Index, func, literal_column
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
-import uuid, datetime
+import uuid, datetime, unicodedata
 
 Base = declarative_base()
 
@@ -14,20 +14,28 @@ class User(Base):
 
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (Index("ix_chats_user_created", "user_id", "created_at", "id"),)
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (Index("ix_messages_chat_created", "chat_id", "created_at", "id"),)
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     chat_id = Column(UUID, ForeignKey("chats.id"))
     role = Column(Text)
     text = Column(Text)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # set in the analyzer's transaction; a message is analyzed at most once
+    analyzed_at = Column(DateTime)
 
 class Vocab(Base):
     __tablename__ = "vocabs"
+    __table_args__ = (
+        UniqueConstraint("base", "pos", name="uq_vocabs_base_pos"),
+        Index("ix_vocabs_base_prefix", "base", postgresql_ops={"base": "text_pattern_ops"}),
+    )
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     base = Column(Text)
     pos = Column(Text)
@@ -37,6 +45,10 @@ class Vocab(Base):
 
 class User_Vocab(Base):
     __tablename__ = "user_vocabs"
+    __table_args__ = (
+        UniqueConstraint("user_id", "vocab_id", name="uq_user_vocabs_user_vocab"),
+        Index("ix_user_vocabs_user_count", "user_id", "count", "id"),
+    )
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID, ForeignKey("users.id"))
     vocab_id = Column(UUID, ForeignKey("vocabs.id"))
@@ -45,11 +57,34 @@ class User_Vocab(Base):
     recall = Column(Float)
     last_viewed = Column(DateTime)
     learning_inertia = Column(Float)
+    # count * (1 - recall), maintained by the analyzer and reviews
+    priority = Column(Float)
+
+# never-viewed words sort as the oldest; the listing sorts on this exact
+# expression so the index below serves it
+NEVER_VIEWED = literal_column("'epoch'::timestamp")
+last_viewed_key = func.coalesce(User_Vocab.last_viewed, NEVER_VIEWED)
+Index("ix_user_vocabs_user_last_viewed", User_Vocab.user_id, last_viewed_key, User_Vocab.id)
+# covering index for card selection: the top daily_limit rows of a user
+Index(
+    "ix_user_vocabs_user_priority",
+    User_Vocab.user_id,
+    User_Vocab.priority.desc().nullslast(),
+    postgresql_include=["vocab_id", "count", "recall"],
+)
+
+def grammar_title_key(title: str) -> str:
+    # case and spacing differences in the model's pattern line do not make
+    # a new grammar item
+    return " ".join(unicodedata.normalize("NFC", title).casefold().split())
 
 class Grammar(Base):
     __tablename__ = "grammars"
+    __table_args__ = (UniqueConstraint("title_key", name="uq_grammars_title_key"),)
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     title = Column(Text)
+    # grammar_title_key(title); one row per pattern however it is spelled
+    title_key = Column(Text)
     function = Column(Text)
     form = Column(Text)
     meaning = Column(Text)
@@ -61,6 +96,10 @@ class Grammar(Base):
 
 class User_Grammar(Base):
     __tablename__ = "user_grammars"
+    __table_args__ = (
+        UniqueConstraint("user_id", "grammar_id", name="uq_user_grammars_user_grammar"),
+        Index("ix_user_grammars_user_count", "user_id", "count", "id"),
+    )
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID, ForeignKey("users.id"))
     grammar_id = Column(UUID, ForeignKey("grammars.id"))
@@ -71,12 +110,20 @@ class User_Grammar(Base):
 
 class VocabOccurrence(Base):
     __tablename__ = "vocab_occurrences"
+    __table_args__ = (
+        Index("ix_vocab_occurrences_message", "message_id"),
+        Index("ix_vocab_occurrences_vocab", "vocab_id"),
+    )
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     vocab_id = Column(UUID, ForeignKey("vocabs.id"))
     message_id = Column(UUID, ForeignKey("messages.id"))
 
 class GrammarOccurrence(Base):
     __tablename__ = "grammar_occurrences"
+    __table_args__ = (
+        Index("ix_grammar_occurrences_message", "message_id"),
+        Index("ix_grammar_occurrences_grammar", "grammar_id"),
+    )
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     grammar_id = Column(UUID, ForeignKey("grammars.id"))
     message_id = Column(UUID, ForeignKey("messages.id"))
\ No newline at end of file
@@ -0,0 +1,87 @@
+import re
+from bisect import bisect_left
+from typing import Optional, Dict
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from back.database.models import Grammar, User_Grammar, GrammarOccurrence, grammar_title_key
+
+FIELDS = ["PATTERN", "FUNCTION", "MEANING", "BOUNDARY"]
+MARKERS = [(field.lower(), f"{field}:") for field in FIELDS]
+# a value runs until the next field name at the start of a line
+VALUE_END_RE = re.compile(rf"\n(?:{'|'.join(FIELDS)}):")
+SPACE_RE = re.compile(r"\s*")
+
+def parse_lesson(text: str) -> Optional[Dict[str, str]]:
+    # Text without "PATTERN:" can never be a lesson and is rejected before
+    # any regex runs. Otherwise one precompiled scan finds where values
+    # end, and the first occurrence of each field name starts its value.
+    if "PATTERN:" not in text:
+        return None
+    ends = [m.start() for m in VALUE_END_RE.finditer(text)]
+    ends.append(len(text))
+    result = {}
+    for key, marker in MARKERS:
+        i = text.find(marker)
+        if i < 0:
+            result[key] = ""
+            continue
+        start = SPACE_RE.match(text, i + len(marker)).end()
+        result[key] = text[start:ends[bisect_left(ends, start)]].strip()
+    if not result["pattern"]:
+        return None
+    return result
+
+def persist_grammar_results(db, user_id, text, message_id):
+    lesson = parse_lesson(text)
+    if lesson:
+        persist_grammar_batch(db, [(user_id, message_id, lesson)])
+
+def persist_grammar_batch(db, items):
+    # items: (user_id, message_id, lesson) per lesson message. Like the
+    # vocab path: counts are aggregated first, each table is written with
+    # one statement in key order, and the grammars upsert returns the ids
+    # of new and existing rows alike.
+    grammar_counts = {}
+    for user_id, message_id, lesson in items:
+        key = grammar_title_key(lesson["pattern"])
+        count, first = grammar_counts.get(key, (0, (lesson, message_id)))
+        grammar_counts[key] = (count + 1, first)
+    if not grammar_counts:
+        return
+
+    stmt = insert(Grammar).values([
+        {
+            "title": lesson["pattern"],
+            "title_key": key,
+            "function": lesson["function"],
+            "meaning": lesson["meaning"],
+            "boundary": lesson["boundary"],
+            "count": count,
+            "message_id": message_id,
+        }
+        for key, (count, (lesson, message_id)) in sorted(grammar_counts.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Grammar.title_key],
+        # rows from before title_key may still have a NULL count
+        set_={"count": func.coalesce(Grammar.count, 0) + stmt.excluded.count},
+    ).returning(Grammar.id, Grammar.title_key)
+    grammar_ids = {key: grammar_id for grammar_id, key in db.execute(stmt)}
+
+    user_counts = {}
+    occurrences = []
+    for user_id, message_id, lesson in items:
+        grammar_id = grammar_ids[grammar_title_key(lesson["pattern"])]
+        user_counts[(user_id, grammar_id)] = user_counts.get((user_id, grammar_id), 0) + 1
+        occurrences.append({"grammar_id": grammar_id, "message_id": message_id})
+
+    stmt = insert(User_Grammar).values([
+        {"user_id": user_id, "grammar_id": grammar_id, "count": count}
+        for (user_id, grammar_id), count in sorted(user_counts.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1])))
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User_Grammar.user_id, User_Grammar.grammar_id],
+        set_={"count": func.coalesce(User_Grammar.count, 0) + stmt.excluded.count},
+    )
+    db.execute(stmt)
+    db.execute(insert(GrammarOccurrence).values(occurrences))
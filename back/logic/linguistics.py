@@ -1,48 +1,58 @@
+from collections import Counter
 from mecab import MeCab
-import pandas as pd
-from itertools import chain
-import random
+
+TARGET_POS = ('VA', 'VV', 'NNG', 'MAG', 'MAJ', 'MM')
+VERB_POS = ('VA', 'VV')
+
+_mecab = None
+
+def get_mecab():
+    # one tagger per process, the dictionary load dominates short messages
+    global _mecab
+    if _mecab is None:
+        _mecab = MeCab()
+    return _mecab
+
+def _is_suffix(pos: str) -> bool:
+    return 'XSA' in pos or 'XSV' in pos
+
+def lemmatize(morphemes):
+    counts = Counter()
+    n = len(morphemes)
+    prev_surface = None
+    # the first and last morphemes are never counted as regular words,
+    # matching the NaN edges of the original shift(1)/shift(-1) masks
+    prev_suffix = True
+    for i, m in enumerate(morphemes):
+        pos = m.pos
+        base = m.surface
+        feature = m.feature
+        if feature.type == 'Inflect' and feature.expression is not None:
+            base = feature.expression.split('/')[0]
+
+        has_xsa = 'XSA' in pos
+        has_xsv = 'XSV' in pos
+        if has_xsa or has_xsv:
+            if prev_surface is not None:
+                combined = prev_surface + base + '다'
+                if has_xsa:
+                    counts[(combined, 'VA')] += 1
+                if has_xsv:
+                    counts[(combined, 'VV')] += 1
+        elif not prev_suffix and i + 1 < n and not _is_suffix(morphemes[i + 1].pos):
+            for tag in pos.split('+'):
+                if tag in TARGET_POS:
+                    counts[(base + '다' if tag in VERB_POS else base, tag)] += 1
+                    break
+
+        prev_surface = m.surface
+        prev_suffix = has_xsa or has_xsv
+
+    return [(base, pos, count) for (base, pos), count in sorted(counts.items())]
 
 def get_base_form(passage: str):
-    target_pos = ['VA', 'VV', 'NNG', 'MAG', 'MAJ', 'MM']
-    mecab = MeCab()
-    parsed = mecab.parse(passage)
-    df = pd.DataFrame([{
-        'surface': m.surface,
-        'pos': m.pos,
-        'type': m.feature.type,
-        'expression': m.feature.expression
-    } for m in parsed])
-    
-    df['base'] = df['surface']
-    inflect_mask = (df['type'] == 'Inflect') & df['expression'].notna()
-    df.loc[inflect_mask, 'base'] = df.loc[inflect_mask, 'expression'].str.split('/').str[0]
-    
-    df['pos_tags'] = df['pos'].str.split('+')
-    df['has_xsa'] = df['pos'].str.contains('XSA')
-    df['has_xsv'] = df['pos'].str.contains('XSV')
-    df['prev_surface'] = df['surface'].shift(1)
-    
-    xsa_mask = df['has_xsa'] & df['prev_surface'].notna()
-    xsv_mask = df['has_xsv'] & df['prev_surface'].notna()
-    
-    df.loc[xsa_mask, 'combined'] = df.loc[xsa_mask, 'prev_surface'] + df.loc[xsa_mask, 'base'] + '다'
-    df.loc[xsv_mask, 'combined'] = df.loc[xsv_mask, 'prev_surface'] + df.loc[xsv_mask, 'base'] + '다'
-    
-    xsa_xsv = (df['has_xsa'] | df['has_xsv']).astype(bool)
-    df['next_has_xsa_xsv'] = xsa_xsv.shift(-1).astype(bool).fillna(False)
-    df['prev_used'] = xsa_xsv.shift(1).astype(bool).fillna(False)
-    
-    va_results = df.loc[xsa_mask, ['combined']].assign(pos='VA').rename(columns={'combined': 'base'})
-    vv_results = df.loc[xsv_mask, ['combined']].assign(pos='VV').rename(columns={'combined': 'base'})
-    
-    regular_mask = ~df['has_xsa'] & ~df['has_xsv'] & ~df['prev_used'] & ~df['next_has_xsa_xsv']
-    regular_df = df.loc[regular_mask].explode('pos_tags')
-    regular_results = regular_df[regular_df['pos_tags'].isin(target_pos)].groupby(level=0).first()[['base', 'pos_tags']].rename(columns={'pos_tags': 'pos'})
-    
-    va_vv_mask = regular_results['pos'].isin(['VA', 'VV'])
-    regular_results.loc[va_vv_mask, 'base'] = regular_results.loc[va_vv_mask, 'base'] + '다'
-    
-    all_results = pd.concat([va_results, vv_results, regular_results]).reset_index(drop=True)
-    counts = all_results.groupby(['base', 'pos']).size().reset_index(name='count')
-    return list(zip(counts['base'], counts['pos'], counts['count']))
+    return lemmatize(get_mecab().parse(passage))
+
+def get_base_form_batch(texts):
+    mecab = get_mecab()
+    return [lemmatize(mecab.parse(text)) if text else [] for text in texts]
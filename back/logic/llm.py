@@ -1,10 +1,48 @@
-from openai import OpenAI
+import asyncio
+import json
+import os
+import re
+import time
+import httpx
+from back.core.metrics import LLM_FIRST_TOKEN_SECONDS, LLM_REQUEST_SECONDS
 
-client = OpenAI()
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", 256))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 256))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 60))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 3))
 
-def translate(text: str) -> dict:
-    translation = client.responses.create(
-        model="gpt-4o",
+# One pooled client for the process, created on first use: the openai
+# package is the heaviest import of the API. The SDK retries connection
+# errors, 408/409/429 and 5xx with exponential backoff and jitter;
+# OPENAI_BASE_URL points it at a local stub for load tests.
+client = None
+limiter = asyncio.Semaphore(LLM_CONCURRENCY)
+
+def get_client():
+    global client
+    if client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        client = AsyncOpenAI(
+            timeout=LLM_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                ),
+            ),
+        )
+    return client
+
+async def close_client():
+    if client is not None:
+        await client.close()
+
+MODEL = "gpt-4o"
+
+def translate_request(text: str) -> dict:
+    return dict(
+        model=MODEL,
         input=[
             {
                 "role": "developer",
@@ -23,11 +61,20 @@ def translate(text: str) -> dict:
             }
         ],
     )
-    return {"translation": translation.output_text}
 
-def lesson(grammar_vocab: str, sentence: str) -> dict:
-    lesson = client.responses.create(
-        model="gpt-4o",
+# Structured lesson output: the model fills these fields and the
+# response is a JSON object, so nothing has to parse the prose.
+LESSON_FIELDS = ("pattern", "function", "meaning", "boundary")
+LESSON_SCHEMA = {
+    "type": "object",
+    "properties": {field: {"type": "string"} for field in LESSON_FIELDS},
+    "required": list(LESSON_FIELDS),
+    "additionalProperties": False,
+}
+
+def lesson_request(grammar_vocab: str, sentence: str, structured: bool = False) -> dict:
+    request = dict(
+        model=MODEL,
         temperature=0.0,
         input=[
             {
@@ -50,4 +97,84 @@ def lesson(grammar_vocab: str, sentence: str) -> dict:
             }
         ],
     )
-    return {"lesson": lesson.output_text}
\ No newline at end of file
+    if structured:
+        request["text"] = {
+            "format": {"type": "json_schema", "name": "lesson", "schema": LESSON_SCHEMA, "strict": True},
+        }
+    return request
+
+def lesson_fields(output_text: str) -> dict:
+    data = json.loads(output_text)
+    return {field: str(data.get(field) or "").strip() for field in LESSON_FIELDS}
+
+def format_lesson(fields: dict) -> str:
+    # the text form shown in chat; parse_lesson reads it back
+    return "\n".join(f"{field.upper()}: {fields[field]}" for field in LESSON_FIELDS)
+
+def json_string_prefix(text: str, start: int):
+    # Decodes the JSON string whose body starts at text[start] as far as it
+    # has arrived; returns the value and the index after its closing quote,
+    # or None while it is still open.
+    i = start
+    while i < len(text):
+        if text[i] == '"':
+            return json.loads(text[start - 1:i + 1], strict=False), i + 1
+        if text[i] == "\\":
+            step = 6 if text[i + 1:i + 2] == "u" else 2
+            if i + step > len(text):
+                break
+            i += step
+        else:
+            i += 1
+    value = json.loads('"' + text[start:i] + '"', strict=False)
+    if value and "\ud800" <= value[-1] <= "\udbff":
+        # half of a surrogate pair
+        value = value[:-1]
+    return value, None
+
+def lesson_prefix(partial: str) -> str:
+    # The chat text of a structured lesson that is still streaming in: the
+    # model writes the fields in schema order, so each call extends the
+    # text of the previous one until format_lesson gives the final form.
+    lines = []
+    end = 0
+    for field in LESSON_FIELDS:
+        match = re.compile(rf'"{field}"\s*:\s*"').search(partial, end)
+        if not match:
+            break
+        value, end = json_string_prefix(partial, match.end())
+        lines.append(f"{field.upper()}: {value.lstrip()}")
+        if end is None:
+            break
+    return "\n".join(lines)
+
+async def complete(request: dict, kind: str = "other") -> str:
+    async with limiter:
+        with LLM_REQUEST_SECONDS.time(kind, "complete"):
+            response = await get_client().responses.create(**request)
+    return response.output_text
+
+async def stream(request: dict, kind: str = "other"):
+    # yields output text deltas as the Responses API produces them
+    async with limiter:
+        start = time.perf_counter()
+        first = True
+        try:
+            # closing the stream releases its connection even when the
+            # consumer stops early, e.g. on a client disconnect
+            async with await get_client().responses.create(**request, stream=True) as events:
+                async for event in events:
+                    if event.type == "response.output_text.delta":
+                        if first:
+                            first = False
+                            LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, kind)
+                        yield event.delta
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, kind, "stream")
+
+async def translate(text: str) -> dict:
+    return {"translation": await complete(translate_request(text), "translate")}
+
+async def lesson(grammar_vocab: str, sentence: str) -> dict:
+    fields = lesson_fields(await complete(lesson_request(grammar_vocab, sentence, structured=True), "lesson"))
+    return {"lesson": format_lesson(fields), "fields": fields}
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", 2048))
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_REDIS_URL = os.environ.get("LLM_CACHE_REDIS_URL")
+
+
+def request_key(request: dict) -> str:
+    # model, prompt and input all live in the request, so identical requests
+    # hash to the same key whichever endpoint built them
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return "llm:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    # Content-addressed cache for LLM outputs: in-memory LRU in front of an
+    # optional Redis shared by all API workers. Concurrent identical
+    # requests are coalesced onto one upstream call.
+    def __init__(self, maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL, redis_url=LLM_CACHE_REDIS_URL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._redis = None
+        # catches nothing until Redis is configured, since redis is only
+        # imported then
+        self._redis_errors = ()
+        if redis_url:
+            from redis.asyncio import Redis
+            from redis.exceptions import RedisError
+            self._redis = Redis.from_url(redis_url)
+            self._redis_errors = RedisError
+        self.hits = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_seconds = 0.0
+        self.upstream_seconds = 0.0
+
+    async def get(self, request: dict):
+        entry = await self._lookup(request_key(request))
+        if entry is None:
+            self.misses += 1
+            return None
+        return entry[0]
+
+    async def put(self, request: dict, text: str, latency: float):
+        self.upstream_seconds += latency
+        await self._store(request_key(request), (text, latency))
+
+    async def get_or_compute(self, request: dict, compute) -> str:
+        # compute: zero-argument callable returning an awaitable of the text
+        key = request_key(request)
+        entry = await self._lookup(key)
+        if entry is not None:
+            return entry[0]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            text, _ = await asyncio.shield(task)
+            return text
+
+        self.coalesced += 1
+        text, latency = await asyncio.shield(task)
+        self.saved_seconds += latency
+        return text
+
+    async def _lookup(self, key):
+        # Redis being down only costs its hits: the lookup falls back to the
+        # local LRU and the store keeps the entry locally
+        entry = self._get_local(key)
+        if entry is None and self._redis is not None:
+            try:
+                raw = await self._redis.get(key)
+            except self._redis_errors:
+                self.redis_errors += 1
+                raw = None
+            if raw is not None:
+                entry = tuple(json.loads(raw))
+                self._put_local(key, entry)
+                self.redis_hits += 1
+        if entry is not None:
+            self.hits += 1
+            self.saved_seconds += entry[1]
+        return entry
+
+    async def _compute(self, key, compute):
+        start = time.perf_counter()
+        text = await compute()
+        latency = time.perf_counter() - start
+        self.upstream_seconds += latency
+        await self._store(key, (text, latency))
+        return text, latency
+
+    async def _store(self, key, entry):
+        self._put_local(key, entry)
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, json.dumps(entry, ensure_ascii=False), ex=self.ttl)
+            except self._redis_errors:
+                self.redis_errors += 1
+
+    def _get_local(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        text, latency, expires = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text, latency
+
+    def _put_local(self, key, entry):
+        self._entries[key] = (entry[0], entry[1], time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "hit_ratio": (self.hits + self.coalesced) / requests if requests else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "upstream_seconds": self.upstream_seconds,
+        }
+
+
+response_cache = ResponseCache()
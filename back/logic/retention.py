@@ -1,5 +1,6 @@
 import numpy as np
 from datetime import datetime
+from sqlalchemy import Float, case, func, literal
 
 def update_recall(user_vocab, failures):
     now = datetime.utcnow()
@@ -11,6 +12,7 @@ def update_recall(user_vocab, failures):
     user_vocab.recall = float(recall)
     user_vocab.learning_inertia = float(a)
     user_vocab.last_viewed = now
+    user_vocab.priority = review_priority(user_vocab.count, user_vocab.recall)
 
 def recompute_recall(user_vocab):
     if user_vocab.last_viewed is None:
@@ -18,4 +20,77 @@ def recompute_recall(user_vocab):
     now = datetime.utcnow()
     t_days = (now - (user_vocab.last_viewed or now)).total_seconds() / 86400
     a = user_vocab.learning_inertia or 0.8
-    user_vocab.recall = float(np.exp(-(1 - a) * t_days))
\ No newline at end of file
+    user_vocab.recall = float(np.exp(-(1 - a) * t_days))
+    user_vocab.priority = review_priority(user_vocab.count, user_vocab.recall)
+
+# get-cards order: count * (1 - recall), 0.8 standing in for an unknown
+# recall. Stored on user_vocabs so card selection is an index read.
+UNKNOWN_FORGETTING = 0.8
+
+def review_priority(count, recall):
+    return (count or 0) * (UNKNOWN_FORGETTING if recall is None else 1 - recall)
+
+def review_priority_sql(count, recall):
+    return count * func.coalesce(1 - recall, UNKNOWN_FORGETTING)
+
+DEFAULT_INERTIA = 0.8
+
+# Array engine: the scalar model above over numpy columns of cards, with
+# time in float days. Entries never viewed carry NaN days.
+RECALL_THRESHOLD = 0.9
+
+def elapsed_days(last_viewed, now=None):
+    now = np.datetime64(now or datetime.utcnow(), "us")
+    return (now - np.array(last_viewed, dtype="datetime64[us]")) / np.timedelta64(1, "D")
+
+def inertia_many(learning_inertia):
+    a = np.array(learning_inertia, dtype=float)
+    return np.where(np.isnan(a) | (a == 0), DEFAULT_INERTIA, a)
+
+def recall_many(t_days, inertia):
+    return np.exp(-(1 - inertia) * t_days)
+
+def update_inertia_many(t_days, inertia, failures):
+    lambda_t = 2 ** (-t_days / 30)
+    return lambda_t * inertia + (1 - lambda_t) * (1 / (1 + np.asarray(failures, dtype=float)))
+
+def next_due_days(inertia, threshold=RECALL_THRESHOLD):
+    # days until recall_many falls to threshold; inf for inertia 1
+    with np.errstate(divide="ignore"):
+        return -np.log(threshold) / (1 - np.asarray(inertia, dtype=float))
+
+def review_many(t_days, inertia, failures, threshold=RECALL_THRESHOLD):
+    # one review of each card t_days after the previous one: the recall it
+    # was reviewed at, its new inertia and the days until it is due again
+    t_days = np.nan_to_num(np.asarray(t_days, dtype=float), nan=0.0)
+    recall = recall_many(t_days, inertia)
+    inertia = update_inertia_many(t_days, inertia, failures)
+    return recall, inertia, next_due_days(inertia, threshold)
+
+def recompute_recall_many(last_viewed, learning_inertia, recall=None, now=None):
+    # Vectorized recompute_recall over whole columns, without touching the
+    # rows: entries never viewed keep their stored recall (NaN if none).
+    t_days = elapsed_days(last_viewed, now)
+    out = recall_many(t_days, inertia_many(learning_inertia))
+    stored = np.full(out.shape, np.nan) if recall is None else np.array(recall, dtype=float)
+    return np.where(np.isnan(t_days), stored, out)
+
+def update_recall_many(last_viewed, learning_inertia, failures, now=None):
+    # update_recall over arrays of reviews; returns the new (recall, inertia)
+    # columns, to be written with last_viewed = now
+    recall, inertia, _ = review_many(elapsed_days(last_viewed, now), inertia_many(learning_inertia), failures)
+    return recall, inertia
+
+# PostgreSQL's exp() raises an underflow error below about -745 where numpy
+# returns 0, so recall_sql clamps the exponent; exp(-700) is 0 all the same
+MIN_RECALL_EXPONENT = -700
+
+def recall_sql(last_viewed, learning_inertia, now):
+    # recompute_recall as a SQL expression, for sorting and filtering in the
+    # database; NULL when last_viewed is NULL (hence CASE: GREATEST would
+    # turn the NULL into the clamp)
+    a = func.coalesce(func.nullif(learning_inertia, 0), DEFAULT_INERTIA)
+    t_days = func.extract("epoch", literal(now) - last_viewed) / 86400
+    exponent = -(1 - a) * t_days
+    exponent = case((exponent < MIN_RECALL_EXPONENT, MIN_RECALL_EXPONENT), else_=exponent)
+    return func.exp(exponent, type_=Float)
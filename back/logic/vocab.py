@@ -0,0 +1,57 @@
+from sqlalchemy.dialects.postgresql import insert
+from back.database.models import Vocab, User_Vocab, VocabOccurrence
+from back.logic.retention import review_priority, review_priority_sql
+
+def persist_vocab_results(db, user_id, vocab_results, message_id):
+    persist_vocab_batch(db, [(user_id, message_id, vocab_results)])
+
+def persist_vocab_batch(db, items):
+    # items: (user_id, message_id, vocab_results) per message. Counts are
+    # aggregated first so each table is written with a single statement,
+    # and rows are sent in key order so concurrent workers lock shared words
+    # in the same order and cannot deadlock each other.
+    vocab_counts = {}
+    for user_id, message_id, vocab_results in items:
+        for base, pos, count in vocab_results:
+            total, first_message_id = vocab_counts.get((base, pos), (0, message_id))
+            vocab_counts[(base, pos)] = (total + count, first_message_id)
+    if not vocab_counts:
+        return
+
+    vocab_ids = upsert_vocabs(db, vocab_counts)
+
+    user_counts = {}
+    occurrences = []
+    for user_id, message_id, vocab_results in items:
+        for base, pos, count in vocab_results:
+            vocab_id = vocab_ids[(base, pos)]
+            user_counts[(user_id, vocab_id)] = user_counts.get((user_id, vocab_id), 0) + count
+            occurrences.append({"vocab_id": vocab_id, "message_id": message_id})
+
+    stmt = insert(User_Vocab).values([
+        {"user_id": user_id, "vocab_id": vocab_id, "count": count, "priority": review_priority(count, None)}
+        for (user_id, vocab_id), count in sorted(user_counts.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1])))
+    ])
+    new_count = User_Vocab.count + stmt.excluded.count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User_Vocab.user_id, User_Vocab.vocab_id],
+        set_={"count": new_count, "priority": review_priority_sql(new_count, User_Vocab.recall)},
+    )
+    db.execute(stmt)
+    db.execute(insert(VocabOccurrence).values(occurrences))
+
+def upsert_vocabs(db, vocab_counts):
+    # (base, pos) -> (count, message_id); returns (base, pos) -> vocab id.
+    # One upsert in (base, pos) order, so all workers lock shared words in
+    # the same order. RETURNING hands back ids for existing and new rows
+    # alike, and a word inserted concurrently by another worker is simply
+    # incremented.
+    stmt = insert(Vocab).values([
+        {"base": base, "pos": pos, "count": vocab_counts[(base, pos)][0], "message_id": vocab_counts[(base, pos)][1]}
+        for base, pos in sorted(vocab_counts)
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Vocab.base, Vocab.pos],
+        set_={"count": Vocab.count + stmt.excluded.count},
+    ).returning(Vocab.id, Vocab.base, Vocab.pos)
+    return {(base, pos): vocab_id for vocab_id, base, pos in db.execute(stmt)}
@@ -1,107 +1,167 @@
-from back.database.db import SessionLocal 
-from back.database.models import Message, Vocab, User_Vocab, Chat, VocabOccurrence, Grammar, User_Grammar, GrammarOccurrence 
-from back.logic.linguistics import get_base_form 
-from uuid import UUID 
-import re 
-from typing import Optional, Dict 
+import argparse
+import time
+import traceback
+from datetime import datetime
+from back.core.metrics import ANALYZER_STAGE_SECONDS
+from back.database.db import SessionLocal
+from back.database.models import Message, Chat
+from back.logic.grammar import parse_lesson, persist_grammar_batch
+from back.logic.linguistics import get_base_form_batch
+from back.logic.vocab import persist_vocab_batch
+from rq.executions import Execution
+from rq.job import Job, JobStatus
+from sqlalchemy import update
+from uuid import UUID
+from typing import Optional, List
 
-def analyze_message(message_id: UUID): 
-    db = SessionLocal() 
-    msg = db.query(Message).get(message_id) 
-    if not msg: 
-        return 
-    chat = db.query(Chat).get(msg.chat_id) 
-    if msg.text and not msg.text.startswith("PATTERN: "):
-        vocab_results = get_base_form(msg.text) 
-        persist_vocab_results( db = db, user_id = chat.user_id, vocab_results = vocab_results, message_id = message_id ) 
-    persist_grammar_results( db = db, user_id = chat.user_id, text = msg.text, message_id = message_id ) 
-    db.commit() 
+BATCH_SIZE = 32
+ANALYZE_MESSAGE = "back.workers.analyze_message.analyze_message"
 
-def persist_vocab_results(db, user_id, vocab_results, message_id): 
-    for base, pos, count in vocab_results: 
-        vocab = ( 
-            db.query(Vocab) 
-            .filter(Vocab.base == base, Vocab.pos == pos) 
-            .first() ) 
-        if not vocab: 
-            vocab = Vocab( 
-                base=base, 
-                pos=pos, 
-                count=count, 
-                message_id=message_id 
-            ) 
-            db.add(vocab) 
-            db.flush()
-        else: 
-            vocab.count += count 
+def analyze_message(message_id: UUID):
+    analyze_messages([message_id])
 
-        user_vocab = ( 
-            db.query(User_Vocab) 
-            .filter( 
-                User_Vocab.user_id == user_id, 
-                User_Vocab.vocab_id == vocab.id ) 
-            .first() 
-            ) 
-        if not user_vocab: 
-            user_vocab = User_Vocab( 
-                user_id=user_id, 
-                vocab_id=vocab.id, 
-                count=count 
-            ) 
-            db.add(user_vocab) 
-        else: 
-            user_vocab.count += count 
+def analyze_messages(message_ids: List[UUID]):
+    db = SessionLocal()
+    try:
+        # Claim the messages in the same transaction that writes the results:
+        # a retried or duplicate job finds analyzed_at set and does nothing,
+        # a concurrent one blocks on the row lock and then finds it set.
+        with ANALYZER_STAGE_SECONDS.time("claim"):
+            claimed = db.scalars(
+                update(Message)
+                .where(Message.id.in_(message_ids), Message.analyzed_at.is_(None))
+                .values(analyzed_at=datetime.utcnow())
+                .returning(Message.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+        if not claimed:
+            db.rollback()
+            return
+        with ANALYZER_STAGE_SECONDS.time("load"):
+            rows = (
+                db.query(Message, Chat.user_id)
+                .join(Chat, Chat.id == Message.chat_id)
+                .filter(Message.id.in_(claimed))
+                .all()
+            )
+        rows = [(msg, user_id) for msg, user_id in rows if msg.text]
+        vocab_rows = [(msg, user_id) for msg, user_id in rows if not msg.text.startswith("PATTERN: ")]
+        with ANALYZER_STAGE_SECONDS.time("tagging"):
+            vocab_batches = get_base_form_batch([msg.text for msg, _ in vocab_rows])
+        with ANALYZER_STAGE_SECONDS.time("vocab"):
+            persist_vocab_batch(db, [
+                (user_id, msg.id, vocab_results)
+                for (msg, user_id), vocab_results in zip(vocab_rows, vocab_batches)
+            ])
+        with ANALYZER_STAGE_SECONDS.time("grammar"):
+            lessons = [(user_id, msg.id, parse_lesson(msg.text)) for msg, user_id in rows]
+            persist_grammar_batch(db, [item for item in lessons if item[2]])
+        with ANALYZER_STAGE_SECONDS.time("commit"):
+            db.commit()
+    finally:
+        db.close()
 
-        vocab_occurrence = VocabOccurrence( 
-            vocab_id=vocab.id, 
-            message_id=message_id 
-        ) 
-        db.add(vocab_occurrence) 
-        
-FIELDS = [ 'PATTERN', 'FUNCTION', 'MEANING', 'BOUNDARY' ] 
+def analyze_pending(queue, batch_size: int = BATCH_SIZE, timeout: Optional[int] = None) -> int:
+    # Pops up to batch_size queued analyze_message jobs and runs them as one
+    # batch: one tagger, one session and one commit instead of one per job.
+    connection = queue.connection
+    job_ids = []
+    if timeout:
+        first = connection.blpop(queue.key, timeout)
+        if not first:
+            return 0
+        job_ids.append(first[1])
+        batch_size -= 1
+    if batch_size > 0:
+        job_ids += connection.lpop(queue.key, batch_size) or []
+    if not job_ids:
+        return 0
 
-def parse_lesson(text: str) -> Optional[Dict[str, str]]: 
-    result = {} 
-    for field in FIELDS: 
-        m = re.search( 
-            rf"{field}:\s*(.*?)(?=\n(?:{'|'.join(FIELDS)}):|\Z)", 
-            text, 
-            flags=re.S 
-        ) 
-        result[field.lower()] = m.group(1).strip() if m else "" 
-    if not result['pattern']: 
-        return None
-    return result 
-    
-def persist_grammar_results(db, user_id, text, message_id): 
-    lesson = parse_lesson(text) 
-    if not lesson: 
-        return 
-    grammar = db.query(Grammar).filter(Grammar.title == lesson['pattern']).first() 
-    if not grammar: 
-        grammar = Grammar( 
-            title=lesson['pattern'], 
-            function=lesson['function'], 
-            meaning=lesson['meaning'], 
-            boundary=lesson['boundary'] 
-        ) 
-        db.add(grammar) 
-    else: 
-        grammar.count += 1 
-    
-    user_grammar = db.query(User_Grammar).filter( 
-        User_Grammar.user_id == user_id, 
-        User_Grammar.grammar_id == grammar.id 
-    ).first() 
-    if not user_grammar: 
-        user_grammar = User_Grammar( 
-            user_id=user_id, 
-            grammar_id=grammar.id, 
-            count=1 ) 
-        db.add(user_grammar) 
-        
-    grammar_occurrence = GrammarOccurrence( 
-        grammar_id=grammar.id, 
-        message_id=message_id 
-    ) 
-    db.add(grammar_occurrence)
\ No newline at end of file
+    job_ids = [i.decode() if isinstance(i, bytes) else i for i in job_ids]
+    jobs = [job for job in Job.fetch_many(job_ids, connection=connection) if job is not None]
+    # popped jobs sit in the started registry while the batch runs, so the
+    # jobs of a worker killed mid-batch expire there and are requeued
+    ttl = max(job.timeout or queue.DEFAULT_TIMEOUT for job in jobs) + 60 if jobs else 0
+    with connection.pipeline() as pipe:
+        executions = [Execution.create(job, ttl, pipe) for job in jobs]
+        for job in jobs:
+            job.set_status(JobStatus.STARTED, pipeline=pipe)
+        pipe.execute()
+
+    done, failed = set(), set()
+
+    def run(job, work):
+        try:
+            work()
+            done.add(job.id)
+        except Exception:
+            failed.add(job.id)
+            queue.failed_job_registry.add(job, exc_string=traceback.format_exc())
+
+    try:
+        batch = [job for job in jobs if batchable(job)]
+        if batch:
+            try:
+                analyze_messages([job.args[0] for job in batch])
+                done.update(job.id for job in batch)
+            except Exception:
+                # fall back to one message per batch so a single bad message
+                # lands in the failed registry instead of dropping the others
+                for job in batch:
+                    run(job, lambda: analyze_messages([job.args[0]]))
+        for job in jobs:
+            if job.id not in done and job.id not in failed:
+                run(job, job.perform)
+    finally:
+        # jobs an unexpected error left unfinished go back on the queue
+        with connection.pipeline() as pipe:
+            for job, execution in zip(jobs, executions):
+                execution.delete(job, pipe)
+                if job.id in done:
+                    job.delete(pipeline=pipe, remove_from_queue=False)
+                elif job.id not in failed:
+                    job.set_status(JobStatus.QUEUED, pipeline=pipe)
+                    queue.push_job_id(job.id, pipeline=pipe)
+            pipe.execute()
+    return len(jobs)
+
+def batchable(job) -> bool:
+    # plain analyze_message(message_id) jobs run as one batch; anything else
+    # on the queue is performed on its own
+    try:
+        return job.func_name == ANALYZE_MESSAGE and len(job.args) == 1 and not job.kwargs
+    except Exception:
+        return False
+
+def requeue_abandoned(queue) -> int:
+    # Puts the jobs of batches that outlived their started-registry entry
+    # back on the queue. Analysis is idempotent, so a batch that did commit
+    # before its worker died just finds its messages already claimed.
+    # ZREM decides which of several workers requeues an entry.
+    connection = queue.connection
+    registry = queue.started_job_registry
+    job_ids = [
+        registry.parse_job_id(entry)
+        for entry in connection.zrangebyscore(registry.key, 0, time.time())
+        if connection.zrem(registry.key, entry)
+    ]
+    jobs = [job for job in Job.fetch_many(job_ids, connection=connection) if job is not None]
+    with connection.pipeline() as pipe:
+        for job in jobs:
+            job.set_status(JobStatus.QUEUED, pipeline=pipe)
+            queue.push_job_id(job.id, pipeline=pipe)
+        pipe.execute()
+    return len(jobs)
+
+def run_batch_worker(batch_size: int = BATCH_SIZE, timeout: int = 5):
+    from back.workers.queues import analyzer_queue
+    while True:
+        requeue_abandoned(analyzer_queue)
+        analyze_pending(analyzer_queue, batch_size=batch_size, timeout=timeout)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch consumer for the mecab_analyzer queue")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--timeout", type=int, default=5)
+    args = parser.parse_args()
+    run_batch_worker(batch_size=args.batch_size, timeout=args.timeout)
@@ -0,0 +1,192 @@
+import time
+
+_started = time.perf_counter()
+
+import argparse
+import json
+import os
+import signal
+import traceback
+from back.core.metrics import register_collector, start_metrics_server
+from back.database.db import engine, pool_metrics
+from back.logic.linguistics import get_base_form_batch
+from back.workers.analyze_message import BATCH_SIZE, analyze_pending, requeue_abandoned
+from back.workers.queues import analyzer_queue, redis
+
+IMPORT_SECONDS = time.perf_counter() - _started
+
+ANALYZER_PROCESSES = int(os.environ.get("ANALYZER_PROCESSES", os.cpu_count() or 1))
+ANALYZER_STATS_INTERVAL = float(os.environ.get("ANALYZER_STATS_INTERVAL", 60))
+# Prometheus endpoint of each serving process: child n of the pool listens
+# on ANALYZER_METRICS_PORT + n; 0 disables it
+ANALYZER_METRICS_PORT = int(os.environ.get("ANALYZER_METRICS_PORT", 0))
+# A child that exits is forked again after ANALYZER_RESPAWN_DELAY seconds,
+# doubling on every further exit of its slot up to ANALYZER_RESPAWN_MAX_DELAY;
+# a child that ran that long resets its slot to the first delay
+ANALYZER_RESPAWN_DELAY = float(os.environ.get("ANALYZER_RESPAWN_DELAY", 1))
+ANALYZER_RESPAWN_MAX_DELAY = float(os.environ.get("ANALYZER_RESPAWN_MAX_DELAY", 60))
+
+# Per process. startup_seconds is filled once by preload (inherited by the
+# forked children); the job counters belong to whichever process serves.
+stats = {
+    "startup_seconds": {"imports": IMPORT_SECONDS},
+    "batches": 0,
+    "jobs": 0,
+    "busy_seconds": 0.0,
+    "max_batch_seconds": 0.0,
+    "first_batch_seconds": None,
+}
+
+_stopping = False
+
+
+def preload():
+    # What a job would otherwise pay for on first use: the MeCab
+    # dictionary. Done once in the parent so forked children share it
+    # copy-on-write.
+    start = time.perf_counter()
+    get_base_form_batch(["분석기를 준비합니다."])
+    stats["startup_seconds"]["mecab"] = time.perf_counter() - start
+
+
+def warm_connection():
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+    stats["startup_seconds"]["db_connect"] = time.perf_counter() - start
+
+
+def worker_stats() -> dict:
+    jobs = stats["jobs"]
+    return {
+        **stats,
+        "pid": os.getpid(),
+        "seconds_per_job": stats["busy_seconds"] / jobs if jobs else None,
+        "pool": pool_metrics(),
+    }
+
+
+@register_collector
+def _worker_metrics():
+    for key, value in stats["startup_seconds"].items():
+        yield "analyzer_startup_seconds", "Analyzer worker startup time by stage", {"stage": key}, value
+    for key in ("batches", "jobs", "busy_seconds", "max_batch_seconds", "first_batch_seconds"):
+        yield f"analyzer_worker_{key}", "Analyzer worker counters", {}, stats[key]
+    for key, value in pool_metrics().items():
+        yield f"db_pool_{key}", "SQLAlchemy connection pool state", {}, value
+    yield "rq_queue_depth", "Jobs waiting in the queue", {"queue": analyzer_queue.name}, analyzer_queue.count
+
+
+def _stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def serve(batch_size: int = BATCH_SIZE, timeout: int = 5):
+    # Batch loop of one process; exits after the current batch on SIGTERM.
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    warm_connection()
+    reported = time.monotonic()
+    while not _stopping:
+        requeue_abandoned(analyzer_queue)
+        start = time.perf_counter()
+        jobs = analyze_pending(analyzer_queue, batch_size=batch_size, timeout=timeout)
+        if jobs:
+            elapsed = time.perf_counter() - start
+            if stats["first_batch_seconds"] is None:
+                stats["first_batch_seconds"] = elapsed
+            stats["batches"] += 1
+            stats["jobs"] += jobs
+            stats["busy_seconds"] += elapsed
+            stats["max_batch_seconds"] = max(stats["max_batch_seconds"], elapsed)
+        if time.monotonic() - reported >= ANALYZER_STATS_INTERVAL:
+            reported = time.monotonic()
+            print("analyzer stats:", json.dumps(worker_stats(), default=str), flush=True)
+
+
+def serve_rq():
+    # Plain RQ jobs without a fork per job: SimpleWorker runs them in this
+    # already warmed process.
+    from rq import SimpleWorker
+    warm_connection()
+    SimpleWorker([analyzer_queue], connection=redis).work()
+
+
+def _spawn(target, args, slot):
+    pid = os.fork()
+    if pid:
+        return pid
+    # the parent's pooled connections must not be shared with the child
+    engine.dispose(close=False)
+    if ANALYZER_METRICS_PORT:
+        start_metrics_server(ANALYZER_METRICS_PORT + slot)
+    code = 0
+    try:
+        target(*args)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    os._exit(code)
+
+
+def run_pool(processes: int = ANALYZER_PROCESSES, batch_size: int = BATCH_SIZE, timeout: int = 5, mode: str = "batch"):
+    preload()
+    print("analyzer startup:", json.dumps(stats["startup_seconds"]), flush=True)
+    target, args = (serve, (batch_size, timeout)) if mode == "batch" else (serve_rq, ())
+    if processes <= 1:
+        if ANALYZER_METRICS_PORT:
+            start_metrics_server(ANALYZER_METRICS_PORT)
+        target(*args)
+        return
+
+    engine.dispose()
+    children = {_spawn(target, args, slot): slot for slot in range(processes)}
+    started = {slot: time.monotonic() for slot in range(processes)}
+    delays = {}  # slot -> delay before its last respawn
+    due = {}  # slot -> when to fork it again
+
+    def forward(signum, frame):
+        _stop(signum, frame)
+        due.clear()
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    while children or due:
+        now = time.monotonic()
+        for slot in [slot for slot, at in due.items() if at <= now]:
+            del due[slot]
+            children[_spawn(target, args, slot)] = slot
+            started[slot] = now
+        try:
+            # only block while no respawn is waiting
+            pid, _ = os.waitpid(-1, os.WNOHANG if due else 0)
+        except ChildProcessError:
+            if not due:
+                break
+            pid = 0
+        if not pid:
+            time.sleep(min(max(min(due.values(), default=now) - time.monotonic(), 0), 0.1))
+            continue
+        slot = children.pop(pid, None)
+        if _stopping or slot is None:
+            continue
+        now = time.monotonic()
+        if slot in delays and now - started[slot] < ANALYZER_RESPAWN_MAX_DELAY:
+            delays[slot] = min(delays[slot] * 2, ANALYZER_RESPAWN_MAX_DELAY)
+        else:
+            delays[slot] = ANALYZER_RESPAWN_DELAY
+        print(f"analyzer child {pid} exited, respawning slot {slot} in {delays[slot]:g}s", flush=True)
+        due[slot] = now + delays[slot]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-forked worker pool for the mecab_analyzer queue")
+    parser.add_argument("--processes", type=int, default=ANALYZER_PROCESSES)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--timeout", type=int, default=5)
+    parser.add_argument("--mode", choices=["batch", "rq"], default="batch")
+    args = parser.parse_args()
+    run_pool(args.processes, args.batch_size, args.timeout, args.mode)
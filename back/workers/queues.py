@@ -0,0 +1,36 @@
+import os
+import re
+from redis import Redis
+from rq import Queue
+from rq.job import Job
+
+redis = Redis(host="localhost", port=6379, db=0)
+analyzer_queue = Queue("mecab_analyzer", connection=redis)
+
+# roles whose messages are analyzed; an empty list analyzes every role
+ANALYZE_ROLES = {r.strip() for r in os.environ.get("ANALYZE_ROLES", "user,assistant").split(",") if r.strip()}
+HANGUL = re.compile("[ㄱ-ㆎ가-힣]")
+
+
+def needs_analysis(role, text) -> bool:
+    # messages without Hangul yield no vocab and, unless they are a lesson,
+    # no grammar either
+    if ANALYZE_ROLES and role not in ANALYZE_ROLES:
+        return False
+    return bool(text) and (text.startswith("PATTERN:") or HANGUL.search(text) is not None)
+
+
+def analysis_job_id(message_id) -> str:
+    return f"analyze_message-{message_id}"
+
+
+def enqueue_analysis(message):
+    # One job per message: the job id is derived from the message id, so a
+    # message that is already queued is not queued again. The analyzer's
+    # analyzed_at claim makes a redelivered job a no-op on top of that.
+    if not needs_analysis(message.role, message.text):
+        return None
+    job_id = analysis_job_id(message.id)
+    if Job.exists(job_id, connection=redis):
+        return None
+    return analyzer_queue.enqueue("back.workers.analyze_message.analyze_message", message.id, job_id=job_id)
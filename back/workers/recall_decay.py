@@ -0,0 +1,102 @@
+import argparse
+import os
+import time
+import traceback
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.exc import DBAPIError
+from back.database.db import SessionLocal
+from back.database.models import User_Vocab
+from back.logic.retention import recall_sql, review_priority_sql
+
+DECAY_BATCH_SIZE = int(os.environ.get("DECAY_BATCH_SIZE", 5000))
+# pause between chunks so the job never saturates the database
+DECAY_SLEEP = float(os.environ.get("DECAY_SLEEP", 0.05))
+DECAY_INTERVAL = float(os.environ.get("DECAY_INTERVAL", 6 * 3600))
+
+
+def decay_chunk(db, after, batch_size, now):
+    # Refreshes recall and priority for the next batch_size rows in id order
+    # after `after`. Returns (last id of the chunk or None at the end, rows
+    # updated, or None when the chunk failed). Rows locked by the analyzer
+    # are skipped rather than waited on. They keep their stale recall, which
+    # the analyzer's upsert reuses for their priority, until the next pass,
+    # up to DECAY_INTERVAL later.
+    bounds = select(User_Vocab.id).order_by(User_Vocab.id).offset(batch_size - 1).limit(1)
+    if after is not None:
+        bounds = bounds.where(User_Vocab.id > after)
+    upper = db.scalar(bounds)
+
+    chunk = select(User_Vocab.id).where(User_Vocab.last_viewed.isnot(None))
+    if after is not None:
+        chunk = chunk.where(User_Vocab.id > after)
+    if upper is not None:
+        chunk = chunk.where(User_Vocab.id <= upper)
+    chunk = chunk.with_for_update(skip_locked=True).cte("chunk")
+
+    recall = recall_sql(User_Vocab.last_viewed, User_Vocab.learning_inertia, now)
+    try:
+        result = db.execute(
+            update(User_Vocab)
+            .where(User_Vocab.id == chunk.c.id)
+            .values(recall=recall, priority=review_priority_sql(User_Vocab.count, recall))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    except DBAPIError:
+        # a row the update cannot compute would otherwise stop every pass
+        # at this chunk; it is reported and the pass moves on
+        traceback.print_exc()
+        db.rollback()
+        return upper, None
+    return upper, result.rowcount
+
+
+def decay_recall(batch_size: int = DECAY_BATCH_SIZE, sleep: float = DECAY_SLEEP) -> dict:
+    # One pass over user_vocabs in short transactions; enqueueable as an RQ
+    # job ("back.workers.recall_decay.decay_recall") or run from the loop below.
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    db = SessionLocal()
+    updated = chunks = failed_chunks = 0
+    after = None
+    try:
+        while True:
+            after, rows = decay_chunk(db, after, batch_size, now)
+            if rows is None:
+                failed_chunks += 1
+            else:
+                updated += rows
+            chunks += 1
+            if after is None:
+                break
+            if sleep:
+                time.sleep(sleep)
+    finally:
+        db.close()
+    return {
+        "updated": updated,
+        "chunks": chunks,
+        "failed_chunks": failed_chunks,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_decay_loop(interval: float = DECAY_INTERVAL, batch_size: int = DECAY_BATCH_SIZE, sleep: float = DECAY_SLEEP):
+    while True:
+        started = time.monotonic()
+        print("recall decay:", decay_recall(batch_size, sleep), flush=True)
+        time.sleep(max(interval - (time.monotonic() - started), 0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh stored recall and review priority")
+    parser.add_argument("--batch-size", type=int, default=DECAY_BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=DECAY_SLEEP)
+    parser.add_argument("--interval", type=float, default=DECAY_INTERVAL)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+    if args.once:
+        print(decay_recall(args.batch_size, args.sleep))
+    else:
+        run_decay_loop(args.interval, args.batch_size, args.sleep)
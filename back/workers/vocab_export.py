@@ -0,0 +1,182 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+from sqlalchemy import String, select
+from back.database.db import SessionLocal
+from back.database.models import User_Vocab, Vocab
+from uuid import UUID
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 10000))
+COPY_ROW_BYTES = 200
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+COLUMNS = [
+    ("user_id", User_Vocab.user_id.cast(String)),
+    ("vocab_id", User_Vocab.vocab_id.cast(String)),
+    ("base", Vocab.base),
+    ("pos", Vocab.pos),
+    ("translation", Vocab.translation),
+    ("count", User_Vocab.count),
+    ("recall", User_Vocab.recall),
+    ("learning_inertia", User_Vocab.learning_inertia),
+    ("priority", User_Vocab.priority),
+    ("last_viewed", User_Vocab.last_viewed),
+    ("created_at", User_Vocab.created_at),
+]
+
+# pyarrow is imported on first export, so the API and workers that never
+# export do not need it installed
+pa = None
+schema = None
+
+def arrow():
+    global pa, schema
+    if pa is None:
+        import pyarrow
+        pa = pyarrow
+        schema = pa.schema([
+            ("user_id", pa.string()),
+            ("vocab_id", pa.string()),
+            ("base", pa.string()),
+            ("pos", pa.string()),
+            ("translation", pa.string()),
+            ("count", pa.int64()),
+            ("recall", pa.float64()),
+            ("learning_inertia", pa.float64()),
+            ("priority", pa.float64()),
+            ("last_viewed", pa.timestamp("us")),
+            ("created_at", pa.timestamp("us")),
+        ])
+    return pa
+
+def export_query(user_id=None):
+    stmt = select(*(expr.label(name) for name, expr in COLUMNS)).join(Vocab, Vocab.id == User_Vocab.vocab_id)
+    if user_id is not None:
+        stmt = stmt.where(User_Vocab.user_id == user_id)
+    return stmt
+
+def record_batches(db, user_id=None, batch_size: int = EXPORT_BATCH_SIZE):
+    # Arrow record batches of roughly batch_size rows; memory is bounded
+    # by a batch or two whatever the table size
+    stmt = export_query(user_id)
+    if db.get_bind().dialect.driver == "psycopg2":
+        yield from copy_batches(db, stmt, batch_size)
+    else:
+        yield from fetch_batches(db, stmt, batch_size)
+
+def fetch_batches(db, stmt, batch_size):
+    # server-side cursor: yield_per streams the rows batch_size at a time
+    arrow()
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+def copy_batches(db, stmt, batch_size):
+    # psycopg2: COPY ... TO STDOUT streams the rows as CSV through a pipe
+    # into pyarrow's CSV reader, so no row becomes a Python object; several
+    # times faster than fetch_batches. A thread feeds the pipe because
+    # copy_expert only returns at the end of the COPY.
+    arrow()
+    import pyarrow.csv as csv
+    sql = stmt.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    connection = db.connection()
+    cursor = connection.connection.dbapi_connection.cursor()
+    cursor.execute("SET LOCAL DateStyle = ISO")
+    read_fd, write_fd = os.pipe()
+    source, sink = open(read_fd, "rb"), open(write_fd, "wb")
+    errors = []
+
+    def produce():
+        try:
+            cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", sink)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            # the reader's end is gone when the consumer stopped early
+            with contextlib.suppress(BrokenPipeError):
+                sink.close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    finished = False
+    try:
+        # no output at all means no rows, or a COPY that failed at once
+        if source.peek(1):
+            reader = csv.open_csv(
+                source,
+                # ~COPY_ROW_BYTES of CSV per row, so batches come out near batch_size rows
+                read_options=csv.ReadOptions(column_names=schema.names, block_size=batch_size * COPY_ROW_BYTES),
+                # COPY quotes values with newlines, which may then cross blocks
+                parse_options=csv.ParseOptions(newlines_in_values=True),
+                # unquoted empty is NULL in COPY's CSV, "" an empty string
+                convert_options=csv.ConvertOptions(
+                    column_types=schema, null_values=[""], strings_can_be_null=True, quoted_strings_can_be_null=False,
+                ),
+            )
+            for batch in reader:
+                yield batch
+        finished = True
+    finally:
+        # a consumer that stops early breaks the pipe under the COPY; that
+        # connection is mid-protocol and is discarded rather than pooled
+        source.close()
+        producer.join()
+        if not finished:
+            connection.invalidate()
+    if errors:
+        raise errors[0]
+
+def write_stream(batches, fmt: str):
+    # Arrow IPC stream or Parquet (one row group per batch), handed out
+    # as bytes after every batch
+    arrow()
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for batch in batches:
+        writer.write_batch(batch)
+        yield drain(sink)
+    writer.close()
+    yield drain(sink)
+
+def drain(sink) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+def export_vocab(fmt: str = "arrow", user_id=None, batch_size: int = EXPORT_BATCH_SIZE):
+    # bytes of the export for one user or, with user_id None, all users
+    db = SessionLocal()
+    try:
+        yield from write_stream(record_batches(db, user_id, batch_size), fmt)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export user vocab as Arrow IPC or Parquet")
+    parser.add_argument("--user", help="user id; all users when omitted")
+    parser.add_argument("--format", choices=sorted(MEDIA_TYPES), default="parquet")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("-o", "--output", help="file to write; stdout when omitted")
+    args = parser.parse_args()
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        user_id = UUID(args.user) if args.user else None
+        for chunk in export_vocab(args.format, user_id, args.batch_size):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
@@ -0,0 +1,89 @@
+"""Corpus-driven analyzer throughput.
+
+    python -m bench.analyze --messages 2000 --batch-size 32 [--save-baseline b.json | --baseline b.json]
+
+Measures the lemmatizer alone (get_base_form per message and
+get_base_form_batch) and then analyze_messages against the database
+named by DATABASE_URL: corpus messages are inserted for a bench user and
+analyzed one per call and --batch-size per call, each message exactly
+once. Reports messages/sec and per-call latency percentiles.
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from back.database.db import SessionLocal
+from back.database.models import Message
+from back.logic.linguistics import get_base_form, get_base_form_batch
+from back.workers.analyze_message import analyze_messages
+from bench import report
+from bench.corpus import SENTENCES
+from bench.seed import seed
+
+
+def corpus(n):
+    return [SENTENCES[i % len(SENTENCES)] for i in range(n)]
+
+
+def time_calls(fn, chunks, count):
+    latencies = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        call = time.perf_counter()
+        fn(chunk)
+        latencies.append(time.perf_counter() - call)
+    return report.summarize(latencies, time.perf_counter() - start, count=count)
+
+
+def insert_messages(chat_id, texts):
+    ids = [uuid.uuid4() for _ in texts]
+    db = SessionLocal()
+    try:
+        db.execute(insert(Message), [
+            {"id": i, "chat_id": chat_id, "role": "user", "text": text, "created_at": datetime.utcnow()}
+            for i, text in zip(ids, texts)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    return ids
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--no-db", action="store_true", help="only the lemmatizer")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    texts = corpus(args.messages)
+    get_base_form_batch(texts[:10])
+    results = {
+        "get_base_form": time_calls(lambda chunk: get_base_form(chunk[0]), chunked(texts, 1), len(texts)),
+        f"get_base_form_batch/{args.batch_size}": time_calls(get_base_form_batch, chunked(texts, args.batch_size), len(texts)),
+    }
+
+    if not args.no_db:
+        user = seed(users=1, vocab=0, messages=0, email="bench-analyze-{}@lexipark.local")[0]
+        singles = insert_messages(user["chat_id"], texts)
+        batches = insert_messages(user["chat_id"], texts)
+        results["analyze_messages/1"] = time_calls(analyze_messages, chunked(singles, 1), len(texts))
+        results[f"analyze_messages/{args.batch_size}"] = time_calls(analyze_messages, chunked(batches, args.batch_size), len(texts))
+
+    print(f"{args.messages} corpus messages")
+    report.print_table(results, unit="msg/s")
+    report.finish(results, args.save_baseline, args.baseline, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Short chat-style Korean messages used by the lemmatizer parity check and
+# the throughput benchmarks. Covers XSA/XSV derivations, irregular
+# inflections, compound tags, punctuation and single-morpheme edge cases.
+SENTENCES = [
+    "안녕하세요",
+    "네",
+    "사과를 먹었다.",
+    "오늘은 날씨가 정말 따뜻하네요.",
+    "어제 친구랑 같이 영화를 봤어요.",
+    "한국어를 공부하는 것이 재미있어요.",
+    "저는 매일 아침에 커피를 마셔요.",
+    "이 문제는 생각보다 훨씬 복잡해요.",
+    "주말에 뭐 할 거예요?",
+    "그 사람은 항상 친절하고 성실해.",
+    "버스가 늦게 와서 회사에 지각했어요.",
+    "시험이 끝나면 같이 여행 가자!",
+    "음식이 너무 매워서 물을 많이 마셨어.",
+    "그래서 결국 아무것도 못 샀어요.",
+    "저 건물 앞에서 기다릴게요.",
+    "선생님께서 숙제를 내 주셨습니다.",
+    "요즘 일이 바빠서 운동을 못 해요.",
+    "혹시 이 근처에 약국이 있나요?",
+    "그는 조용히 방으로 들어갔다.",
+    "새 옷을 입으니까 기분이 좋아졌어요.",
+    "비가 올 것 같으니 우산을 챙기세요.",
+    "우리는 그 문제에 대해 오랫동안 이야기했다.",
+    "아이들이 공원에서 신나게 뛰어놀고 있어요.",
+    "이 책은 읽을수록 더 재미있어진다.",
+    "너무 피곤해서 일찍 잤어.",
+    "그럼 내일 다시 연락할게요.",
+    "모든 학생이 열심히 노력했지만 결과는 아쉬웠다.",
+    "한국 음식 중에서 김치찌개를 제일 좋아해요.",
+    "지하철역까지 걸어서 십 분 정도 걸려요.",
+    "솔직히 말하면 별로 관심이 없어.",
+    "Hello, 오늘 meeting은 몇 시예요?",
+    "ㅋㅋㅋ 진짜 웃기다",
+    "빨리 와!!!",
+    "이것은 아주 새로운 방법이다",
+    "부모님께 감사하다고 말씀드렸어요.",
+    "그 영화가 생각보다 지루했어요.",
+    "깨끗하게 청소해 주세요.",
+    "다음 주에 이사할 예정이에요.",
+    "모르는 단어가 많아서 사전을 찾아봤어요.",
+    "천천히 말씀해 주시면 감사하겠습니다.",
+]
@@ -0,0 +1,130 @@
+"""Query-plan checks for the indexed hot paths.
+
+    python -m bench.explain [--natural] [--users 5 --vocab 2000]
+
+Seeds bench users into DATABASE_URL (see bench.seed), then EXPLAINs the
+queries the routers and the analyzer run. Each query is built from the
+same expressions as its caller, and the script fails if the plan does not
+use the index that query is meant to use, with an index-only scan for the
+queries in INDEX_ONLY. By default sequential scans are
+disabled for the session, which checks that the index can serve the query
+at all, even on tables too small for the planner to bother. --natural
+keeps the planner's own choice, which is the check to run on production
+sized data.
+"""
+import argparse
+import json
+import uuid
+
+from sqlalchemy import select
+
+from back.core.pagination import keyset_query
+from back.database.db import SessionLocal
+from back.database.models import (
+    Chat, Grammar, GrammarOccurrence, Message, User_Grammar, User_Vocab, Vocab, VocabOccurrence,
+    grammar_title_key, last_viewed_key,
+)
+from bench.seed import seed
+
+LIMIT = 100
+# queries whose expected index must serve them with an index-only scan
+INDEX_ONLY = {"POST /memorize/get-cards"}
+
+
+def queries(db, user_id, chat_id, message_id, vocab_ids):
+    vocab_table = (
+        db.query(Vocab.base, Vocab.translation, User_Vocab.count, User_Vocab.recall)
+        .join(User_Vocab, User_Vocab.vocab_id == Vocab.id)
+        .filter(User_Vocab.user_id == user_id)
+    )
+    grammar_table = (
+        db.query(Grammar.title, Grammar.function, User_Grammar.count, User_Grammar.recall)
+        .join(User_Grammar, User_Grammar.grammar_id == Grammar.id)
+        .filter(User_Grammar.user_id == user_id)
+    )
+    # (name, expected index or indexes any of which will do, statement)
+    return [
+        ("GET /chat", "ix_chats_user_created",
+         keyset_query(db.query(Chat.id, Chat.created_at).filter(Chat.user_id == user_id), Chat.created_at, Chat.id, LIMIT)),
+        ("GET /chat/{chat_id}", "ix_messages_chat_created",
+         keyset_query(db.query(Message.id, Message.text).filter(Message.chat_id == chat_id), Message.created_at, Message.id, LIMIT)),
+        ("POST /memorize/get-cards", "ix_user_vocabs_user_priority",
+         db.query(User_Vocab.vocab_id, User_Vocab.count, User_Vocab.recall, Vocab.base, Vocab.translation)
+         .join(Vocab, User_Vocab.vocab_id == Vocab.id)
+         .filter(User_Vocab.user_id == user_id).order_by(User_Vocab.priority.desc().nullslast()).limit(20)),
+        ("POST /memorize/review-batch", "uq_user_vocabs_user_vocab",
+         db.query(User_Vocab.id).filter(User_Vocab.user_id == user_id, User_Vocab.vocab_id.in_(vocab_ids))),
+        ("GET /mypage/vocab-table count", "ix_user_vocabs_user_count",
+         keyset_query(vocab_table, User_Vocab.count, User_Vocab.id, LIMIT)),
+        ("GET /mypage/vocab-table last_viewed", "ix_user_vocabs_user_last_viewed",
+         keyset_query(vocab_table, last_viewed_key, User_Vocab.id, LIMIT)),
+        ("GET /mypage/grammar-table", "ix_user_grammars_user_count",
+         keyset_query(grammar_table, User_Grammar.count, User_Grammar.id, LIMIT)),
+        ("vocab by (base, pos)", ("uq_vocabs_base_pos", "ix_vocabs_base_prefix"),
+         select(Vocab.id).where(Vocab.base == "단어1", Vocab.pos == "VV")),
+        ("grammar by title key", "uq_grammars_title_key",
+         select(Grammar.id).where(Grammar.title_key == grammar_title_key("verb+ㄹ/을게요"))),
+        ("vocab occurrences of a message", "ix_vocab_occurrences_message",
+         select(VocabOccurrence.id).where(VocabOccurrence.message_id == message_id)),
+        ("vocab occurrences of a word", "ix_vocab_occurrences_vocab",
+         select(VocabOccurrence.id).where(VocabOccurrence.vocab_id == vocab_ids[0])),
+        ("grammar occurrences of a message", "ix_grammar_occurrences_message",
+         select(GrammarOccurrence.id).where(GrammarOccurrence.message_id == message_id)),
+        ("grammar occurrences of a grammar", "ix_grammar_occurrences_grammar",
+         select(GrammarOccurrence.id).where(GrammarOccurrence.grammar_id == uuid.uuid4())),
+    ]
+
+
+def plan_indexes(node, index_only=False) -> set:
+    found = set()
+    if "Index Name" in node and (not index_only or node["Node Type"] == "Index Only Scan"):
+        found.add(node["Index Name"])
+    for child in node.get("Plans", []):
+        found |= plan_indexes(child, index_only)
+    return found
+
+
+def explain(db, statement):
+    statement = getattr(statement, "statement", statement)
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql.replace("%", "%%")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--natural", action="store_true", help="leave sequential scans enabled")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--vocab", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    user = seed(users=args.users, vocab=args.vocab, messages=args.messages, email="bench-explain-{}@lexipark.local")[0]
+    db = SessionLocal()
+    try:
+        if not args.natural:
+            db.connection().exec_driver_sql("SET enable_seqscan = off")
+        message_id = db.scalar(select(Message.id).where(Message.chat_id == user["chat_id"]).limit(1))
+        vocab_ids = db.scalars(select(User_Vocab.vocab_id).where(User_Vocab.user_id == user["user_id"]).limit(20)).all()
+        failures = 0
+        for name, expected, statement in queries(db, user["user_id"], user["chat_id"], message_id, vocab_ids):
+            expected = (expected,) if isinstance(expected, str) else expected
+            plan = explain(db, statement)
+            used = plan_indexes(plan)
+            ok = bool(plan_indexes(plan, name in INDEX_ONLY).intersection(expected))
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:36} {expected[0]:34} {', '.join(sorted(used)) or plan['Node Type']}")
+            if args.verbose or not ok:
+                print(json.dumps(plan, indent=2))
+    finally:
+        db.rollback()
+        db.close()
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Vocab export against paging the JSON vocab table.
+
+    python -m bench.export [--vocab 100000] [--batch-size 10000]
+
+Seeds one bench user with --vocab words into DATABASE_URL (see
+bench.seed), then fetches that user's full vocab three ways: paging
+/mypage/vocab-table at the maximum page size, encoded the way FastAPI
+encodes it, and the Arrow IPC and Parquet exports. Exports are read back
+to check the row count, and the COPY path is checked against the
+yield_per path on data that includes multi-line translations. Reports
+rows/sec, bytes and Arrow's peak allocation during the exports, which is
+the bound on export memory.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from uuid import UUID
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update
+
+from back.api.mypage import get_vocab_table
+from back.core.pagination import MAX_LIMIT
+from back.database.db import SessionLocal
+from back.database.models import User_Vocab, Vocab
+from back.workers.vocab_export import copy_batches, export_query, export_vocab, fetch_batches
+from bench.seed import seed
+
+
+def json_pages(user_id):
+    db = SessionLocal()
+    size = 0
+    cursor = None
+    try:
+        while True:
+            page = get_vocab_table(
+                sort="count", order="desc", q=None, limit=MAX_LIMIT, cursor=cursor,
+                current_user=SimpleNamespace(id=user_id), db=db,
+            )
+            size += len(json.dumps(jsonable_encoder(page)).encode())
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return size
+    finally:
+        db.close()
+
+
+def exported(fmt, user_id, batch_size, path):
+    # written out as it streams, like the CLI; rows are counted afterwards
+    # so reading back does not count towards the export's memory
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in export_vocab(fmt, user_id, batch_size):
+            size += f.write(chunk)
+    return size
+
+
+def exported_rows(fmt, path):
+    if fmt == "parquet":
+        return pq.ParquetFile(path).metadata.num_rows
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_stream(source).read_all().num_rows
+
+
+def multiline_translations(user_id, every=50):
+    # translations with quoted newlines, commas and quotes in every
+    # `every`th word, so CSV rows span lines and cross reader blocks
+    db = SessionLocal()
+    try:
+        vocab_ids = db.scalars(
+            select(User_Vocab.vocab_id).where(User_Vocab.user_id == user_id).order_by(User_Vocab.vocab_id)
+        ).all()[::every]
+        db.execute(
+            update(Vocab).where(Vocab.id.in_(vocab_ids))
+            .values(translation=Vocab.base + '\nsecond line, with "quotes"\n')
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def check_paths(user_id, batch_size):
+    # the COPY fast path and the portable yield_per path give the same table,
+    # at the given batch size and at a small one whose many reader blocks
+    # are all but sure to split a multi-line value
+    db = SessionLocal()
+    try:
+        for size in (batch_size, 100):
+            tables = []
+            for batches in (copy_batches, fetch_batches):
+                tables.append(pa.Table.from_batches(list(batches(db, export_query(user_id), size))).sort_by("vocab_id"))
+                db.rollback()
+            if not tables[0].equals(tables[1]):
+                raise SystemExit(f"COPY and yield_per exports differ at batch size {size}")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vocab", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    user = seed(users=1, vocab=args.vocab, messages=0, email="bench-export-{}@lexipark.local")[0]
+    user_id = UUID(user["user_id"])
+    multiline_translations(user_id)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {fmt: os.path.join(tmp, f"vocab.{fmt}") for fmt in ("arrow", "parquet")}
+        runs = {
+            f"json pages of {MAX_LIMIT}": lambda: json_pages(user_id),
+            "arrow ipc": lambda: exported("arrow", user_id, args.batch_size, paths["arrow"]),
+            "parquet": lambda: exported("parquet", user_id, args.batch_size, paths["parquet"]),
+        }
+        print(f"{'':20} {'seconds':>9} {'rows/s':>10} {'MB':>8}")
+        for name, run in runs.items():
+            start = time.perf_counter()
+            size = run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:20} {elapsed:9.2f} {args.vocab / elapsed:10.0f} {size / 1e6:8.2f}")
+        print(f"arrow peak allocation: {pa.default_memory_pool().max_memory() / 1e6:.1f} MB")
+
+        for fmt, path in paths.items():
+            rows = exported_rows(fmt, path)
+            if rows != args.vocab:
+                raise SystemExit(f"{fmt} export has {rows} rows, expected {args.vocab}")
+    check_paths(user_id, args.batch_size)
+    print("row counts and COPY/yield_per parity ok")
+
+
+if __name__ == "__main__":
+    main()
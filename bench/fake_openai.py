@@ -0,0 +1,126 @@
+"""Local stand-in for the OpenAI endpoints the API calls.
+
+    python -m bench.fake_openai [--port 8100] [--latency 0.8]
+
+Point the API at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1 and any
+OPENAI_API_KEY. Responses echo the input after a fixed delay, so load
+tests measure our own overhead and concurrency rather than the model's.
+Requests with a json_schema text format get a JSON object with the echo
+in every string property.
+Streamed responses send the first delta after --ttft and spread the rest
+of --latency over the remaining chunks.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY = float(os.environ.get("FAKE_OPENAI_LATENCY", 0.8))
+TTFT = float(os.environ.get("FAKE_OPENAI_TTFT", 0.15))
+
+app = FastAPI()
+
+
+def output_text(body: dict) -> str:
+    messages = body.get("input") or []
+    last = messages[-1]["content"] if messages else ""
+    text = f"[{body.get('model')}] {last}"
+    fmt = (body.get("text") or {}).get("format") or {}
+    if fmt.get("type") == "json_schema":
+        properties = fmt.get("schema", {}).get("properties", {})
+        return json.dumps({name: text for name in properties}, ensure_ascii=False)
+    return text
+
+
+def response_object(body: dict, text: str) -> dict:
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model"),
+        "status": "completed",
+        "output": [{
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+    }
+
+
+def sse(data: dict) -> str:
+    return f"event: {data['type']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_events(body: dict, text: str):
+    response = response_object(body, text)
+    item_id = response["output"][0]["id"]
+    chunks = [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+    interval = max(LATENCY - TTFT, 0) / len(chunks)
+    seq = 0
+    yield sse({"type": "response.created", "sequence_number": seq, "response": {**response, "status": "in_progress", "output": []}})
+    await asyncio.sleep(TTFT)
+    for i, chunk in enumerate(chunks):
+        if i:
+            await asyncio.sleep(interval)
+        seq += 1
+        yield sse({
+            "type": "response.output_text.delta",
+            "sequence_number": seq,
+            "item_id": item_id,
+            "output_index": 0,
+            "content_index": 0,
+            "delta": chunk,
+            "logprobs": [],
+        })
+    seq += 1
+    yield sse({"type": "response.completed", "sequence_number": seq, "response": response})
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    body = await request.json()
+    text = output_text(body)
+    if body.get("stream"):
+        return StreamingResponse(stream_events(body, text), media_type="text/event-stream")
+    await asyncio.sleep(LATENCY)
+    return response_object(body, text)
+
+
+@app.post("/v1/realtime/sessions")
+async def realtime_sessions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(LATENCY)
+    return {
+        "id": f"sess_{uuid.uuid4().hex}",
+        "object": "realtime.session",
+        "model": body.get("model"),
+        "client_secret": {"value": f"ek_{uuid.uuid4().hex}", "expires_at": int(time.time()) + 60},
+    }
+
+
+def main():
+    global LATENCY, TTFT
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=LATENCY)
+    parser.add_argument("--ttft", type=float, default=TTFT)
+    args = parser.parse_args()
+    LATENCY = args.latency
+    TTFT = args.ttft
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
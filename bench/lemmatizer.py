@@ -0,0 +1,102 @@
+"""Parity check and messages/sec for get_base_form.
+
+    python -m bench.lemmatizer [--rounds N]
+
+Runs the pre-rewrite pandas lemmatizer (one MeCab per call) next to the
+single-pass engine in back.logic.linguistics, fails if any message of the
+corpus lemmatizes differently, then reports throughput for both.
+"""
+import argparse
+import time
+
+import pandas as pd
+from mecab import MeCab
+
+from back.logic.linguistics import get_base_form
+from bench.corpus import SENTENCES
+
+
+def legacy_get_base_form(passage: str):
+    target_pos = ['VA', 'VV', 'NNG', 'MAG', 'MAJ', 'MM']
+    mecab = MeCab()
+    parsed = mecab.parse(passage)
+    df = pd.DataFrame([{
+        'surface': m.surface,
+        'pos': m.pos,
+        'type': m.feature.type,
+        'expression': m.feature.expression
+    } for m in parsed])
+
+    df['base'] = df['surface']
+    inflect_mask = (df['type'] == 'Inflect') & df['expression'].notna()
+    df.loc[inflect_mask, 'base'] = df.loc[inflect_mask, 'expression'].str.split('/').str[0]
+
+    df['pos_tags'] = df['pos'].str.split('+')
+    df['has_xsa'] = df['pos'].str.contains('XSA')
+    df['has_xsv'] = df['pos'].str.contains('XSV')
+    df['prev_surface'] = df['surface'].shift(1)
+
+    xsa_mask = df['has_xsa'] & df['prev_surface'].notna()
+    xsv_mask = df['has_xsv'] & df['prev_surface'].notna()
+
+    df.loc[xsa_mask, 'combined'] = df.loc[xsa_mask, 'prev_surface'] + df.loc[xsa_mask, 'base'] + '다'
+    df.loc[xsv_mask, 'combined'] = df.loc[xsv_mask, 'prev_surface'] + df.loc[xsv_mask, 'base'] + '다'
+
+    xsa_xsv = (df['has_xsa'] | df['has_xsv']).astype(bool)
+    df['next_has_xsa_xsv'] = xsa_xsv.shift(-1).astype(bool).fillna(False)
+    df['prev_used'] = xsa_xsv.shift(1).astype(bool).fillna(False)
+
+    va_results = df.loc[xsa_mask, ['combined']].assign(pos='VA').rename(columns={'combined': 'base'})
+    vv_results = df.loc[xsv_mask, ['combined']].assign(pos='VV').rename(columns={'combined': 'base'})
+
+    regular_mask = ~df['has_xsa'] & ~df['has_xsv'] & ~df['prev_used'] & ~df['next_has_xsa_xsv']
+    regular_df = df.loc[regular_mask].explode('pos_tags')
+    regular_results = regular_df[regular_df['pos_tags'].isin(target_pos)].groupby(level=0).first()[['base', 'pos_tags']].rename(columns={'pos_tags': 'pos'})
+
+    va_vv_mask = regular_results['pos'].isin(['VA', 'VV'])
+    regular_results.loc[va_vv_mask, 'base'] = regular_results.loc[va_vv_mask, 'base'] + '다'
+
+    all_results = pd.concat([va_results, vv_results, regular_results]).reset_index(drop=True)
+    counts = all_results.groupby(['base', 'pos']).size().reset_index(name='count')
+    return list(zip(counts['base'], counts['pos'], counts['count']))
+
+
+def check_parity(texts):
+    mismatches = []
+    for text in texts:
+        expected = [(b, p, int(c)) for b, p, c in legacy_get_base_form(text)]
+        actual = get_base_form(text)
+        if expected != actual:
+            mismatches.append((text, expected, actual))
+    return mismatches
+
+
+def messages_per_sec(fn, texts, rounds):
+    fn(texts[0])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text)
+    return rounds * len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    mismatches = check_parity(SENTENCES)
+    for text, expected, actual in mismatches:
+        print(f"MISMATCH {text!r}\n  legacy: {expected}\n  engine: {actual}")
+    if mismatches:
+        raise SystemExit(1)
+    print(f"parity ok on {len(SENTENCES)} messages")
+
+    before = messages_per_sec(legacy_get_base_form, SENTENCES, args.rounds)
+    after = messages_per_sec(get_base_form, SENTENCES, args.rounds)
+    print(f"legacy pandas : {before:10.1f} msg/s")
+    print(f"single pass   : {after:10.1f} msg/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
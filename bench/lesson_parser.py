@@ -0,0 +1,93 @@
+"""Parity check and messages/sec for parse_lesson.
+
+    python -m bench.lesson_parser [--rounds N] [--fuzz N]
+
+Runs the pre-rewrite parser (one regex built and searched per field) next
+to the precompiled one-pass parser in back.logic.grammar on the
+chat corpus, hand-written lessons and randomly assembled lesson-like
+texts, fails on any difference, then reports throughput for both on
+ordinary chat text and on lessons.
+"""
+import argparse
+import random
+import re
+import time
+
+from back.logic.llm import format_lesson
+from back.logic.grammar import FIELDS, parse_lesson
+from bench.corpus import SENTENCES
+
+LESSONS = [
+    "PATTERN: verb+ㄹ/을게요\nFUNCTION: promise or intention\nMEANING: I will\nBOUNDARY: not for third persons",
+    "PATTERN: noun+이/가 아니다\nMEANING: is not\nFUNCTION: negation of identity",
+    "PATTERN:\nFUNCTION: only a function",
+    "PATTERN:   \n\n  adj+네요  \nBOUNDARY: not in writing\n",
+    "Here is the lesson.\nPATTERN: verb+고 싶다\nFUNCTION: desire\nPATTERN: repeated\nMEANING: want to",
+    "PATTERN: a FUNCTION: inline\nMEANING: b\n FUNCTION: indented",
+    "FUNCTION: no pattern at all\nMEANING: x",
+    "pattern: lowercase is not a field",
+    format_lesson({"pattern": "verb+아/어 보다", "function": "trying", "meaning": "try doing", "boundary": "not for states"}),
+]
+
+
+def legacy_parse_lesson(text):
+    result = {}
+    for field in FIELDS:
+        m = re.search(
+            rf"{field}:\s*(.*?)(?=\n(?:{'|'.join(FIELDS)}):|\Z)",
+            text,
+            flags=re.S
+        )
+        result[field.lower()] = m.group(1).strip() if m else ""
+    if not result['pattern']:
+        return None
+    return result
+
+
+def fuzz(n, seed=0):
+    rng = random.Random(seed)
+    pieces = [f"{field}:" for field in FIELDS] + ["\n", " ", "\n\n", "  ", "값", "verb+ㄹ게요", "text", "PATTERN", ":"]
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(1, 12))) for _ in range(n)]
+
+
+def check_parity(texts):
+    mismatches = []
+    for text in texts:
+        expected = legacy_parse_lesson(text)
+        actual = parse_lesson(text)
+        if expected != actual:
+            mismatches.append((text, expected, actual))
+    return mismatches
+
+
+def messages_per_sec(fn, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text)
+    return rounds * len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    args = parser.parse_args()
+
+    texts = SENTENCES + LESSONS + fuzz(args.fuzz)
+    mismatches = check_parity(texts)
+    for text, expected, actual in mismatches[:20]:
+        print(f"MISMATCH {text!r}\n  legacy: {expected}\n  parser: {actual}")
+    if mismatches:
+        raise SystemExit(1)
+    print(f"parity ok on {len(texts)} texts")
+
+    for name, sample in (("chat", SENTENCES), ("lessons", LESSONS)):
+        before = messages_per_sec(legacy_parse_lesson, sample, args.rounds)
+        after = messages_per_sec(parse_lesson, sample, args.rounds)
+        print(f"{name:8} legacy : {before:12.1f} msg/s")
+        print(f"{name:8} one pass: {after:12.1f} msg/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Concurrent load against /llm/translate.
+
+    python -m bench.llm_load [--url http://127.0.0.1:8000] [--requests 500] [--concurrency 200]
+
+Run the API against bench.fake_openai. Every request carries a distinct
+text so the response cache cannot absorb the load.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+async def run(url, requests, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(client):
+        async with gate:
+            start = time.perf_counter()
+            r = await client.post("/llm/translate", json={"text": f"load {uuid.uuid4().hex}"})
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    return elapsed, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    elapsed, latencies = asyncio.run(run(args.url, args.requests, args.concurrency))
+    print(f"{args.requests} requests, concurrency {args.concurrency}: {args.requests / elapsed:.1f} req/s")
+    print(f"p50 {statistics.median(latencies) * 1000:.0f} ms  p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Load generator for the API hot paths.
+
+    python -m bench.serve --fake-redis &          # API + fake OpenAI
+    python -m bench.load --requests 500 --concurrency 50 [--save-baseline b.json | --baseline b.json]
+
+Seeds bench users into DATABASE_URL (see bench.seed), then drives each
+endpoint in turn with a closed loop of --concurrency clients spread over
+the seeded users, and reports throughput and p50/p95/p99 per endpoint.
+The API must share DATABASE_URL and the JWT secret with this process.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+import uuid
+
+import httpx
+
+from bench import report
+from bench.corpus import SENTENCES
+from bench.seed import seed
+
+
+def scenarios(users, rng):
+    user_cycle = itertools.cycle(users)
+    sorts = itertools.cycle(["count", "recall", "last_viewed"])
+
+    def auth(user):
+        return {"Authorization": f"Bearer {user['token']}"}
+
+    def chat_message():
+        user = next(user_cycle)
+        body = {"chat_id": user["chat_id"], "role": "user", "text": rng.choice(SENTENCES)}
+        return "POST", "/chat/message", {"json": body, "headers": auth(user)}
+
+    def get_cards():
+        return "POST", "/memorize/get-cards", {"headers": auth(next(user_cycle))}
+
+    def vocab_table():
+        params = {"sort": next(sorts), "limit": 100}
+        return "GET", "/mypage/vocab-table", {"params": params, "headers": auth(next(user_cycle))}
+
+    def translate():
+        # distinct text per request so the response cache does not absorb it
+        return "POST", "/llm/translate", {"json": {"text": f"{rng.choice(SENTENCES)} {uuid.uuid4().hex[:8]}"}}
+
+    return {
+        "POST /chat/message": chat_message,
+        "POST /memorize/get-cards": get_cards,
+        "GET /mypage/vocab-table": vocab_table,
+        "POST /llm/translate": translate,
+    }
+
+
+async def drive(client, make_request, requests, concurrency, warmup):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, path, kwargs = make_request()
+            start = time.perf_counter()
+            try:
+                r = await client.request(method, path, **kwargs)
+                ok = r.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    for _ in range(warmup):
+        method, path, kwargs = make_request()
+        await client.request(method, path, **kwargs)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return report.summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def run(url, users, requests, concurrency, warmup, only, seed_value):
+    rng = random.Random(seed_value)
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        for name, make_request in scenarios(users, rng).items():
+            if only and not any(o in name for o in only):
+                continue
+            results[name] = await drive(client, make_request, requests, concurrency, warmup)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--vocab", type=int, default=2000)
+    parser.add_argument("--only", action="append", help="run endpoints whose name contains this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    users = seed(users=args.users, vocab=args.vocab, seed=args.seed)
+    results = asyncio.run(run(args.url, users, args.requests, args.concurrency, args.warmup, args.only, args.seed))
+    print(f"{args.url}: {args.requests} requests per endpoint, concurrency {args.concurrency}")
+    report.print_table(results)
+    report.finish(results, args.save_baseline, args.baseline, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
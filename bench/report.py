@@ -0,0 +1,89 @@
+"""Latency summaries and baseline comparison shared by the bench scripts.
+
+A baseline is a JSON file of {name: summary}. compare() flags a name whose
+p95 grew or whose throughput fell by more than the tolerance.
+"""
+import json
+import math
+
+# p95 changes smaller than this are timer noise, whatever the ratio
+NOISE_MS = 1.0
+
+
+def percentile(sorted_values, q):
+    # nearest rank on an already sorted list
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)]
+
+
+def summarize(latencies, elapsed, errors=0, count=None) -> dict:
+    # count: units of work behind the latencies when that is not one per
+    # sample, e.g. messages in timed batches
+    values = sorted(latencies)
+    count = len(values) if count is None else count
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput": count / elapsed if elapsed else 0.0,
+        "p50_ms": _ms(percentile(values, 50)),
+        "p95_ms": _ms(percentile(values, 95)),
+        "p99_ms": _ms(percentile(values, 99)),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+def print_table(results: dict, unit="req/s"):
+    print(f"{'':28} {'n':>7} {'err':>5} {unit:>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:28} {r['requests']:7d} {r['errors']:5d} {r['throughput']:10.1f} "
+            f"{_fmt(r['p50_ms'])} {_fmt(r['p95_ms'])} {_fmt(r['p99_ms'])}"
+        )
+
+
+def _fmt(value):
+    return f"{'-':>9}" if value is None else f"{value:9.1f}"
+
+
+def save_baseline(path, results: dict):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare(path, results: dict, tolerance=0.2) -> list:
+    with open(path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if (
+            base.get("p95_ms") and r["p95_ms"]
+            and r["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+            and r["p95_ms"] - base["p95_ms"] > NOISE_MS
+        ):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f} -> {r['p95_ms']:.1f} ms")
+        if base.get("throughput") and r["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput']:.1f} -> {r['throughput']:.1f}")
+        if r["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {r['errors']}")
+    return regressions
+
+
+def finish(results: dict, save=None, baseline=None, tolerance=0.2):
+    # shared tail of the CLI scripts: store and/or check, exit 1 on regression
+    if save:
+        save_baseline(save, results)
+        print(f"baseline saved to {save}")
+    if baseline:
+        regressions = compare(baseline, results, tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+        print(f"no regressions against {baseline} (tolerance {tolerance:.0%})")
@@ -0,0 +1,150 @@
+"""Offline benchmark for the retention engine in back/logic/retention.py.
+
+Two parts:
+  throughput  review_many over --cards cards at once, against the scalar
+              update_recall looped over objects
+  replay      a synthetic learner reviewed for --days days under each
+              scheduling policy; reports how well the collection is
+              retained and how many failed attempts it cost
+
+The learner has a hidden true inertia per card that the scheduler never
+sees; only its failure counts reach the engine, exactly as in
+/memorize/review-batch.
+
+    python -m bench.retention_sim --cards 1000000 --days 60
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from back.logic.retention import (
+    DEFAULT_INERTIA,
+    RECALL_THRESHOLD,
+    recall_many,
+    review_many,
+    UNKNOWN_FORGETTING,
+    update_recall,
+)
+
+MAX_FAILURES = 5
+
+
+def throughput(n, rng):
+    t_days = rng.exponential(10, n)
+    t_days[rng.random(n) < 0.2] = np.nan
+    inertia = rng.uniform(0.3, 0.95, n)
+    failures = rng.integers(0, 4, n)
+    review_many(t_days[:1000], inertia[:1000], failures[:1000])
+    start = time.perf_counter()
+    review_many(t_days, inertia, failures)
+    vector = n / (time.perf_counter() - start)
+
+    sample = min(n, 20000)
+    now = datetime.utcnow()
+    cards = [
+        SimpleNamespace(
+            last_viewed=None if np.isnan(t) else now - timedelta(days=float(t)),
+            learning_inertia=float(a),
+            count=1,
+        )
+        for t, a in zip(t_days[:sample], inertia[:sample])
+    ]
+    start = time.perf_counter()
+    for card, f in zip(cards, failures[:sample]):
+        update_recall(card, int(f))
+    scalar = sample / (time.perf_counter() - start)
+    return vector, scalar
+
+
+class Deck:
+    # Engine state (what the database holds) next to the hidden learner.
+    def __init__(self, n, rng):
+        self.rng = rng
+        self.count = rng.zipf(1.6, n).clip(max=500).astype(float)
+        self.last_viewed = np.full(n, np.nan)
+        self.inertia = np.full(n, DEFAULT_INERTIA)
+        self.recall = np.full(n, np.nan)
+        self.due = np.zeros(n)
+        self.true_inertia = rng.uniform(0.5, 0.9, n)
+        self.true_last = np.zeros(n)
+
+    def true_recall(self, day):
+        return recall_many(day - self.true_last, self.true_inertia)
+
+    def review(self, idx, day):
+        p = self.true_recall(day)[idx]
+        # failed attempts before the card is recalled, as the swipe UI counts them
+        failures = np.minimum(self.rng.geometric(np.clip(p, 0.05, 1)) - 1, MAX_FAILURES)
+        gain = np.where(failures == 0, 0.5, 0.8)
+        self.true_inertia[idx] = 1 - (1 - self.true_inertia[idx]) * gain
+        self.true_last[idx] = day
+
+        recall, inertia, due = review_many(day - self.last_viewed[idx], self.inertia[idx], failures)
+        self.recall[idx] = recall
+        self.inertia[idx] = inertia
+        self.last_viewed[idx] = day
+        self.due[idx] = day + due
+        return failures
+
+
+def pick(policy, deck, day, k):
+    if policy == "priority":
+        # what /memorize/get-cards serves: count * (1 - recall), with recall
+        # kept current by the decay job
+        recall = recall_many(day - deck.last_viewed, deck.inertia)
+        score = deck.count * np.where(np.isnan(recall), UNKNOWN_FORGETTING, 1 - recall)
+    elif policy == "due":
+        # most overdue first, frequent words breaking ties
+        score = (day - deck.due) + deck.count * 1e-6
+    else:
+        score = deck.rng.random(len(deck.count))
+    return np.argpartition(-score, k - 1)[:k]
+
+
+def replay(policy, cards, days, daily, seed):
+    deck = Deck(cards, np.random.default_rng(seed))
+    failures = 0
+    start = time.perf_counter()
+    for day in range(days):
+        failures += int(deck.review(pick(policy, deck, day, daily), day).sum())
+    elapsed = time.perf_counter() - start
+    retained = deck.true_recall(days)
+    seen = ~np.isnan(deck.last_viewed)
+    return {
+        "policy": policy,
+        "seen": int(seen.sum()),
+        "retention": float(np.average(retained, weights=deck.count)),
+        "retention_seen": float(retained[seen].mean()) if seen.any() else 0.0,
+        "failures": failures,
+        "reviews_per_sec": days * daily / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=1_000_000)
+    parser.add_argument("--deck", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--daily", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vector, scalar = throughput(args.cards, np.random.default_rng(args.seed))
+    print(f"update_recall  : {scalar:14,.0f} cards/s")
+    print(f"review_many    : {vector:14,.0f} cards/s  ({vector / scalar:.0f}x)")
+    print()
+    print(f"replay: {args.deck} cards, {args.days} days, {args.daily} reviews/day, threshold {RECALL_THRESHOLD}")
+    print(f"{'policy':10} {'seen':>6} {'retention':>10} {'seen ret.':>10} {'failures':>9} {'reviews/s':>10}")
+    for policy in ("priority", "due", "random"):
+        r = replay(policy, args.deck, args.days, args.daily, args.seed)
+        print(
+            f"{r['policy']:10} {r['seen']:6d} {r['retention']:10.3f} {r['retention_seen']:10.3f} "
+            f"{r['failures']:9d} {r['reviews_per_sec']:10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
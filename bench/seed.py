@@ -0,0 +1,127 @@
+"""Seeds the database named by DATABASE_URL with benchmark users.
+
+    python -m bench.seed --users 20 --vocab 2000 --messages 200
+
+Creates the schema from back/database/models.py if it is missing, then
+bench users (bench-<n>@lexipark.local) that each have a chat with
+messages and a user_vocabs row for every seeded word with random counts,
+recall and review history. Re-running replaces the bench users' rows and
+leaves every other user alone.
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+
+from back.core.security import create_access_token
+from back.database.db import SessionLocal, engine
+from back.database.models import (
+    Base, Chat, Grammar, GrammarOccurrence, Message, User, User_Grammar, User_Vocab, Vocab, VocabOccurrence,
+)
+from back.logic.retention import review_priority
+from bench.corpus import SENTENCES
+
+EMAIL = "bench-{}@lexipark.local"
+POS = ("NNG", "VV", "VA", "MAG")
+
+
+def clear(db, emails):
+    users = select(User.id).where(User.email.in_(emails))
+    chats = select(Chat.id).where(Chat.user_id.in_(users))
+    messages = select(Message.id).where(Message.chat_id.in_(chats))
+    # bench messages may have been analyzed by a running worker
+    db.execute(delete(VocabOccurrence).where(VocabOccurrence.message_id.in_(messages)))
+    db.execute(delete(GrammarOccurrence).where(GrammarOccurrence.message_id.in_(messages)))
+    db.execute(update(Vocab).where(Vocab.message_id.in_(messages)).values(message_id=None))
+    db.execute(update(Grammar).where(Grammar.message_id.in_(messages)).values(message_id=None))
+    db.execute(delete(Message).where(Message.chat_id.in_(chats)))
+    db.execute(delete(Chat).where(Chat.user_id.in_(users)))
+    db.execute(delete(User_Vocab).where(User_Vocab.user_id.in_(users)))
+    db.execute(delete(User_Grammar).where(User_Grammar.user_id.in_(users)))
+    db.execute(delete(User).where(User.email.in_(emails)))
+
+
+def seed_vocab(db, n):
+    words = [(f"단어{i}", POS[i % len(POS)]) for i in range(n)]
+    existing = dict(
+        ((base, pos), vocab_id)
+        for vocab_id, base, pos in db.execute(
+            select(Vocab.id, Vocab.base, Vocab.pos).where(Vocab.base.in_([b for b, _ in words]))
+        )
+    )
+    missing = [w for w in words if w not in existing]
+    if missing:
+        rows = [{"id": uuid.uuid4(), "base": base, "pos": pos, "count": 1, "translation": f"word {base}"} for base, pos in missing]
+        db.execute(insert(Vocab), rows)
+        existing.update({(r["base"], r["pos"]): r["id"] for r in rows})
+    return [existing[w] for w in words]
+
+
+def seed(users=20, vocab=2000, messages=200, seed=0, email=EMAIL) -> list:
+    # -> [{"user_id", "chat_id", "token"}] for the load generator
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    emails = [email.format(i) for i in range(users)]
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        clear(db, emails)
+        vocab_ids = seed_vocab(db, vocab)
+        seeded = []
+        for address in emails:
+            user_id, chat_id = uuid.uuid4(), uuid.uuid4()
+            db.execute(insert(User), [{"id": user_id, "email": address, "daily_limit": 20}])
+            db.execute(insert(Chat), [{"id": chat_id, "user_id": user_id, "created_at": now}])
+            db.execute(insert(Message), [
+                {
+                    "chat_id": chat_id,
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "text": rng.choice(SENTENCES),
+                    "created_at": now - timedelta(seconds=messages - i),
+                    "analyzed_at": now,
+                }
+                for i in range(messages)
+            ])
+            rows = []
+            for vocab_id in vocab_ids:
+                count = int(rng.paretovariate(1.2))
+                viewed = rng.random() < 0.6
+                recall = rng.random() if viewed else None
+                rows.append({
+                    "user_id": user_id,
+                    "vocab_id": vocab_id,
+                    "count": count,
+                    "recall": recall,
+                    "last_viewed": now - timedelta(days=rng.random() * 30) if viewed else None,
+                    "learning_inertia": rng.uniform(0.3, 0.95) if viewed else None,
+                    "priority": review_priority(count, recall),
+                })
+            db.execute(insert(User_Vocab), rows)
+            seeded.append({
+                "user_id": str(user_id),
+                "chat_id": str(chat_id),
+                "token": create_access_token({"sub": str(user_id), "email": address}),
+            })
+        db.commit()
+    finally:
+        db.close()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return seeded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--vocab", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    seeded = seed(args.users, args.vocab, args.messages, args.seed)
+    print(f"seeded {len(seeded)} users x {args.vocab} words, {args.messages} messages each")
+
+
+if __name__ == "__main__":
+    main()
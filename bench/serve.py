@@ -0,0 +1,52 @@
+"""Runs the API against local stand-ins for the load benchmarks.
+
+    python -m bench.serve [--port 8000] [--fake-redis] [--latency 0.8]
+
+Starts bench.fake_openai on --openai-port and points the API at it. With
+--fake-redis the analyzer queue lives in an in-process fakeredis instead
+of a local Redis, so messages are enqueued but never analyzed. Postgres
+is whatever DATABASE_URL names; seed it with bench.seed or bench.load.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--openai-port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.8)
+    parser.add_argument("--ttft", type=float, default=0.15)
+    parser.add_argument("--fake-redis", action="store_true")
+    args = parser.parse_args()
+
+    fake_openai = subprocess.Popen([
+        sys.executable, "-m", "bench.fake_openai",
+        "--port", str(args.openai_port), "--latency", str(args.latency), "--ttft", str(args.ttft),
+    ])
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.openai_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    if args.fake_redis:
+        import fakeredis
+        import redis
+        redis.Redis = fakeredis.FakeRedis
+    # uvicorn re-raises SIGTERM after shutting down; exit normally instead
+    # so the fake OpenAI server is stopped too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        time.sleep(1)
+        uvicorn.run("back.api.main:app", host=args.host, port=args.port, log_level="warning")
+    finally:
+        fake_openai.terminate()
+        fake_openai.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""API cold-start benchmark.
+
+Imports back.api.main in a fresh interpreter under `-X importtime`, sums
+self time per top-level package and fails if a module the API must not
+load at import time shows up. Wall time is the median of --runs fresh
+interpreters.
+
+    python -m bench.startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+TARGET = "back.api.main"
+# heavy dependencies that only workers or individual endpoints need; they
+# are imported on first use. numpy stays eager: the vocab table and review
+# endpoints need it on their first request.
+FORBIDDEN = ("pandas", "mecab", "openai", "google", "rq", "redis", "back.workers.analyze_message")
+
+
+def import_profile(target=TARGET):
+    # -> {module: (self_us, cumulative_us)} from one fresh interpreter
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    out = result.stderr
+    if result.returncode:
+        errors = [line for line in out.splitlines() if not line.startswith("import time:")]
+        raise SystemExit(f"import {target} failed:\n" + "\n".join(errors))
+    profile = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def by_package(profile):
+    totals = defaultdict(int)
+    for name, (self_us, _) in profile.items():
+        totals[name.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def forbidden_imports(profile):
+    return sorted(
+        f for f in FORBIDDEN
+        if any(name == f or name.startswith(f + ".") for name in profile)
+    )
+
+
+def wall_seconds(target=TARGET):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {target}"], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", default=TARGET)
+    args = parser.parse_args()
+
+    profile = import_profile(args.target)
+    total = sum(self_us for self_us, _ in profile.values())
+    print(f"{args.target}: {len(profile)} modules, {total / 1000:.0f} ms import self time")
+    for package, self_us in by_package(profile)[:args.top]:
+        print(f"  {package:28} {self_us / 1000:8.1f} ms")
+
+    wall = statistics.median(wall_seconds(args.target) for _ in range(args.runs))
+    print(f"cold start (median of {args.runs}): {wall * 1000:.0f} ms")
+
+    loaded = forbidden_imports(profile)
+    if loaded:
+        print("imported at startup but should be lazy:", ", ".join(loaded))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Time-to-first-token of /llm/translate/stream against blocking /llm/translate.
+
+    python -m bench.ttft [--url http://127.0.0.1:8000] [--requests 20]
+
+Run the API against bench.fake_openai. Texts are unique per request so
+every call reaches the upstream.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+async def blocking(client):
+    start = time.perf_counter()
+    r = await client.post("/llm/translate", json={"text": f"ttft {uuid.uuid4().hex}"})
+    r.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+async def streamed(client):
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", "/llm/translate/stream", json={"text": f"ttft {uuid.uuid4().hex}"}) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            if first is None and line == "event: delta":
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def run(url, requests):
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        results = {}
+        for name, fn in (("blocking", blocking), ("stream", streamed)):
+            results[name] = [await fn(client) for _ in range(requests)]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, samples in asyncio.run(run(args.url, args.requests)).items():
+        ttft = statistics.median(s[0] for s in samples) * 1000
+        total = statistics.median(s[1] for s in samples) * 1000
+        print(f"{name:9s} ttft p50 {ttft:7.1f} ms   total p50 {total:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
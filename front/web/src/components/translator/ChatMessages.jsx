@@ -1,10 +1,15 @@
 // src/components/translator/ChatMessages.jsx
-export default function ChatMessages({ messages, onSelect }) {
+export default function ChatMessages({ messages, onSelect, hasOlder, onLoadOlder }) {
     return (
       <div
         className="card-body"
         style={{ display: "flex", flexDirection: "column", gap: "8px", overflowY: "auto" }}
       >
+        {hasOlder && (
+          <button className="btn btn-outline-secondary" onClick={onLoadOlder}>
+            Load earlier messages
+          </button>
+        )}
         {messages.map((msg) => (
           <div
             key={msg.id}
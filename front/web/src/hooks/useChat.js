@@ -1,9 +1,12 @@
 import { useEffect, useRef, useState, useCallback } from "react";
-import { apiGet, apiPost } from "../services/api";
+import { apiGet, apiPost, apiStream } from "../services/api";
+
+const toMessage = (m) => ({ id: m.id, role: m.role, text: m.text });
 
 export function useChat() {
   const [chatId, setChatId] = useState(null);
   const [messages, setMessages] = useState([]);
+  const [olderCursor, setOlderCursor] = useState(null);
   const hydratedChatIdRef = useRef(null);
 
   // restore chat id
@@ -16,29 +19,31 @@ export function useChat() {
   useEffect(() => {
     if (chatId) return;
     (async () => {
-      const chats = await apiGet("/chat");
-      if (chats?.length) setChatId(chats[0].id);
+      const chats = await apiGet("/chat?limit=1");
+      if (chats?.items?.length) setChatId(chats.items[0].id);
     })();
   }, [chatId]);
 
-  // hydrate messages
+  // hydrate messages: the newest page, older pages on request
   useEffect(() => {
     if (!chatId) return;
     if (hydratedChatIdRef.current === chatId) return;
 
     (async () => {
       const data = await apiGet(`/chat/${chatId}`);
-      setMessages(
-        data.map(m => ({
-          id: m.id,
-          role: m.role,
-          text: m.text
-        }))
-      );
+      setMessages(data.items.map(toMessage));
+      setOlderCursor(data.next_cursor);
       hydratedChatIdRef.current = chatId;
     })();
   }, [chatId]);
 
+  const loadOlderMessages = useCallback(async () => {
+    if (!chatId || !olderCursor) return;
+    const data = await apiGet(`/chat/${chatId}?before=${encodeURIComponent(olderCursor)}`);
+    setMessages(m => [...data.items.map(toMessage), ...m]);
+    setOlderCursor(data.next_cursor);
+  }, [chatId, olderCursor]);
+
   const ensureChat = useCallback(async () => {
     if (chatId) return chatId;
     const data = await apiPost("/chat/create", {});
@@ -85,21 +90,42 @@ export function useChat() {
     const cid = await addUserMessage(text);          // saves user msg
     const botId = addAssistantPlaceholder();         // typing bubble
   
-    const data = await apiPost("/llm/translate", { text });
-    const out = data.translation ?? data.output ?? "";
+    const out = await apiStream("/llm/translate/stream", { text }, {
+      onDelta: (delta) => updateAssistantStreaming(botId, delta),
+    });
   
     await finalizeAssistantMessage(botId, out, cid); // update + persist assistant
     return out;
-  }, [addUserMessage, addAssistantPlaceholder, finalizeAssistantMessage]);
+  }, [addUserMessage, addAssistantPlaceholder, updateAssistantStreaming, finalizeAssistantMessage]);
+
+  // The server streams the lesson and stores it with its grammar once it
+  // is complete, so unlike translations nothing is posted back afterwards.
+  const explainAndAppend = useCallback(async (grammarVocab, sentence) => {
+    const botId = addAssistantPlaceholder();
+    const cid = chatId ?? await ensureChat();
+
+    let saved = null;
+    const text = await apiStream("/llm/lesson/stream", { chat_id: cid, grammar_vocab: grammarVocab, sentence }, {
+      onDelta: (delta) => updateAssistantStreaming(botId, delta),
+      onDone: (payload) => { saved = payload; },
+    });
+    setMessages(m =>
+      m.map(x => x.id === botId ? { id: saved?.message_id ?? botId, role: "assistant", text } : x)
+    );
+    return saved;
+  }, [chatId, ensureChat, addAssistantPlaceholder, updateAssistantStreaming]);
 
   return {
     chatId,
     messages,
+    hasOlderMessages: Boolean(olderCursor),
+    loadOlderMessages,
     addUserMessage,
     addAssistantPlaceholder,
     updateAssistantStreaming,
     finalizeAssistantMessage,
     translateAndAppend,
+    explainAndAppend,
   };
   
 }
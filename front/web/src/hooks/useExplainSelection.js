@@ -1,8 +1,7 @@
 // src/hooks/useExplainSelection.js
 import { useCallback, useState } from "react";
-import { apiPost } from "../services/api";
 
-export function useExplainSelection({ addAssistantPlaceholder, finalizeAssistantMessage }) {
+export function useExplainSelection({ explainAndAppend }) {
   const [selection, setSelection] = useState(null);
 
   const handleSelection = useCallback((sentence) => {
@@ -27,13 +26,8 @@ export function useExplainSelection({ addAssistantPlaceholder, finalizeAssistant
     const { text, sentence } = selection;
     setSelection(null);
 
-    const botId = addAssistantPlaceholder();
-
-    const data = await apiPost("/llm/lesson", { grammar_vocab: text, sentence });
-    const out = data.explanation ?? data.lesson ?? data.output ?? "";
-
-    await finalizeAssistantMessage(botId, out);
-  }, [selection, addAssistantPlaceholder, finalizeAssistantMessage]);
+    await explainAndAppend(text, sentence);
+  }, [selection, explainAndAppend]);
 
   return { selection, handleSelection, explain };
 }
@@ -1,14 +1,31 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import FlashCard from "../components/memorize/FlashCard";
 
 const N = 5;
 
+// Sends the queued review results in one request; keepalive lets the
+// request finish when it is fired while the page is being left.
+function submitReviews(pending) {
+  const reviews = pending.current.splice(0);
+  if (reviews.length === 0) return;
+  fetch("http://127.0.0.1:8000/memorize/review-batch", {
+    method: "POST",
+    keepalive: true,
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${localStorage.getItem("access_token")}`,
+    },
+    body: JSON.stringify({ reviews }),
+  });
+}
+
 export default function Memorize() {
   const [cards, setCards] = useState([]);
   const [side, setSide] = useState("front");
   const [failures, setFailures] = useState(0);
   const [remaining, setRemaining] = useState(N);
   const [loading, setLoading] = useState(true);
+  const pending = useRef([]);
 
   useEffect(() => {
     fetch("http://127.0.0.1:8000/memorize/get-cards", {
@@ -36,6 +53,15 @@ export default function Memorize() {
         setLoading(false);
       });
   }, []);
+
+  useEffect(() => {
+    const flush = () => submitReviews(pending);
+    window.addEventListener("pagehide", flush);
+    return () => {
+      window.removeEventListener("pagehide", flush);
+      flush();
+    };
+  }, []);
   
   
   if (loading) {
@@ -65,18 +91,12 @@ export default function Memorize() {
     }
   
     // SUCCESS
-    fetch("http://127.0.0.1:8000/memorize/review", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${localStorage.getItem("access_token")}`,
-      },
-      body: JSON.stringify({
-        vocab_id: card.vocab_id,
-        success: true,
-        failures
-      })
+    pending.current.push({
+      vocab_id: card.vocab_id,
+      success: true,
+      failures
     });
+    if (remaining <= 1 || cards.length <= 1) submitReviews(pending);
   
     setFailures(0);
     setRemaining(r => r - 1);
@@ -24,7 +24,9 @@ async function apiGet(path) {
 
 export default function Mypage() {
   const [vocab, setVocab] = useState([]);
+  const [vocabCursor, setVocabCursor] = useState(null);
   const [grammar, setGrammar] = useState([]);
+  const [grammarCursor, setGrammarCursor] = useState(null);
   const [err, setErr] = useState("");
 
   useEffect(() => {
@@ -37,8 +39,10 @@ export default function Mypage() {
           apiGet("/mypage/grammar-table"),
         ]);
         if (cancelled) return;
-        setVocab(v);
-        setGrammar(g);
+        setVocab(v.items);
+        setVocabCursor(v.next_cursor);
+        setGrammar(g.items);
+        setGrammarCursor(g.next_cursor);
       } catch (e) {
         if (cancelled) return;
         console.error(e);
@@ -51,6 +55,28 @@ export default function Mypage() {
     };
   }, []);
 
+  async function loadMoreVocab() {
+    try {
+      const v = await apiGet(`/mypage/vocab-table?cursor=${encodeURIComponent(vocabCursor)}`);
+      setVocab(rows => [...rows, ...v.items]);
+      setVocabCursor(v.next_cursor);
+    } catch (e) {
+      console.error(e);
+      setErr(String(e?.message || e));
+    }
+  }
+
+  async function loadMoreGrammar() {
+    try {
+      const g = await apiGet(`/mypage/grammar-table?cursor=${encodeURIComponent(grammarCursor)}`);
+      setGrammar(rows => [...rows, ...g.items]);
+      setGrammarCursor(g.next_cursor);
+    } catch (e) {
+      console.error(e);
+      setErr(String(e?.message || e));
+    }
+  }
+
   return (
     <div>
       <h2>My Learning Stats</h2>
@@ -62,7 +88,17 @@ export default function Mypage() {
       )}
 
       <VocabTable data={vocab} />
+      {vocabCursor && (
+        <button className="btn btn-outline-secondary" onClick={loadMoreVocab}>
+          Load more
+        </button>
+      )}
       <GrammarTable data={grammar} />
+      {grammarCursor && (
+        <button className="btn btn-outline-secondary" onClick={loadMoreGrammar}>
+          Load more
+        </button>
+      )}
     </div>
   );
 }
@@ -16,10 +16,10 @@ export default function Translator() {
 
   const {
     messages,
-    addAssistantPlaceholder,
-    updateAssistantStreaming,
-    finalizeAssistantMessage,
-    translateAndAppend
+    hasOlderMessages,
+    loadOlderMessages,
+    translateAndAppend,
+    explainAndAppend
   } = useChat();
 
   async function handleSubmit(e) {
@@ -45,14 +45,16 @@ export default function Translator() {
     selection,
     handleSelection,
     explain
-  } = useExplainSelection({
-    addAssistantPlaceholder,
-    finalizeAssistantMessage
-  });
+  } = useExplainSelection({ explainAndAppend });
 
   return (
     <div className="card" style={{ height: "85vh" }}>
-      <ChatMessages messages={messages} onSelect={handleSelection} />
+      <ChatMessages
+        messages={messages}
+        onSelect={handleSelection}
+        hasOlder={hasOlderMessages}
+        onLoadOlder={loadOlderMessages}
+      />
       <ChatComposer
         inputValue={inputValue}
         setInputValue={setInputValue}
@@ -49,6 +49,57 @@ export async function apiRequest(path, { method = "GET", auth = true, json = tru
   return res.text();
 }
 
+// POSTs and reads a server-sent event stream: "delta" events go to onDelta,
+// the "done" event resolves with the full text and hands its whole payload
+// to onDone.
+export async function apiStream(path, body, { auth = true, onDelta, onDone } = {}) {
+  const res = await fetch(`${API_BASE}${path}`, {
+    method: "POST",
+    headers: buildHeaders({ auth, headers: { Accept: "text/event-stream" } }),
+    body: JSON.stringify(body),
+  });
+
+  if (!res.ok) {
+    const msg = await parseError(res);
+    throw new Error(`${res.status} ${msg}`);
+  }
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  let text = "";
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === "delta") {
+        text += payload.delta;
+        onDelta?.(payload.delta);
+      } else if (event === "done") {
+        onDone?.(payload);
+        return payload.text ?? text;
+      } else if (event === "error") {
+        throw new Error(payload.detail || "stream error");
+      }
+    }
+  }
+  return text;
+}
+
 export const apiGet = (path, opts) => apiRequest(path, { ...opts, method: "GET" });
 export const apiPost = (path, body, opts) => apiRequest(path, { ...opts, method: "POST", body });
 export const apiPut = (path, body, opts) => apiRequest(path, { ...opts, method: "PUT", body });